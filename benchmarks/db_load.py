@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""Compares the sequential and parallel DBStorage.all()
+
+Usage: python3 -m benchmarks.db_load [places] [workers] [latency ms]
+
+Fills an SQLite database (or, with HBNB_TYPE_STORAGE=db, the MySQL
+database of the HBNB_MYSQL_* variables) with the synthetic store of
+benchmarks.file_formats, then times all() reading the six tables one
+after another and then through a pool of threads.
+
+SQLite runs in-process, so there is no network round trip for the
+threads to overlap; a latency adds that wait to every statement to
+stand in for a remote server.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ORDER = ('State', 'City', 'User', 'Amenity', 'Place', 'Review')
+
+
+def measure(label, storage, runs=3):
+    """Prints the best time of all() over runs, each in a new session"""
+    best = None
+    for run in range(runs):
+        storage.close()
+        start = time.perf_counter()
+        count = len(storage.all())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('{:<12} all() {:8.3f}s  {:,d} objects'.format(label, best, count))
+
+
+def main():
+    """Runs the benchmark"""
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0
+    directory = tempfile.TemporaryDirectory()
+    os.environ.setdefault('HBNB_TYPE_STORAGE', 'sqlite')
+    os.environ.setdefault('HBNB_SQLITE_DB',
+                          os.path.join(directory.name, 'hbnb.db'))
+    from benchmarks.file_formats import make_records
+    from models import storage
+    from sqlalchemy import event
+
+    records = make_records(places)
+    for name in ORDER:
+        rows = [record for record in records.values()
+                if record['__class__'] == name]
+        storage.bulk_insert(name, rows, 5000)
+    print('{:,d} rows in {}'.format(len(records), type(storage).__name__))
+
+    if latency:
+        @event.listens_for(storage._DBStorage__engine, 'before_execute')
+        def wait(*args):
+            """Waits as for a network round trip"""
+            time.sleep(latency)
+        print('{:.0f} ms per statement'.format(latency * 1000))
+
+    storage.workers = 1
+    measure('sequential', storage)
+    storage.workers = workers
+    measure('{} threads'.format(workers), storage)
+    storage.close()
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""Measures what publishing the change events of a save costs
+
+Usage: python3 -m benchmarks.events [publishes] [changes per publish]
+
+Times EventBus.publish() of the same prebuilt changes, as record()
+folds them for a save, with no subscriber, with a subscriber called in
+the publishing thread and with a queued subscriber, whose callback runs
+on a worker thread of its own. The bus is timed alone: the cost of a
+save() itself, which writes the file, would hide it.
+"""
+import sys
+import time
+from models.engine.event_bus import EventBus, record
+
+
+def measure(label, bus, changes, publishes):
+    """Prints the time per publish() of changes"""
+    start = time.perf_counter()
+    for i in range(publishes):
+        bus.publish(changes)
+    elapsed = time.perf_counter() - start
+    bus.flush()
+    waited = time.perf_counter() - start
+    print('{:<12} {:8.2f} us per publish, {:8.3f}s with the queue drained'
+          .format(label, elapsed / publishes * 1e6, waited))
+
+
+def main():
+    """Runs the benchmark"""
+    publishes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    changes = {}
+    for i in range(size):
+        record(changes, 'State.{:08d}'.format(i), 'updated', ('name',))
+    bus = EventBus()
+    received = []
+
+    measure('none', bus, changes, publishes)
+    subscriber = bus.subscribe(received.append)
+    measure('synchronous', bus, changes, publishes)
+    bus.unsubscribe(subscriber)
+    subscriber = bus.subscribe(received.append, queued=True)
+    measure('queued', bus, changes, publishes)
+    bus.unsubscribe(subscriber)
+    print('{:,d} events received'.format(len(received)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""Compares the JSON and binary FileStorage formats
+
+Usage: python3 -m benchmarks.file_formats [number of places]
+
+Builds a synthetic store of states, cities, users, places and reviews
+shaped like to_dict() output, then times a save and a load of it in
+both formats, and the load followed by the building of the model
+objects as FileStorage.reload() does, and prints the file sizes.
+"""
+import io
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+from models.engine import binary_format
+from models.engine import query
+
+
+def make_records(places):
+    """Returns a synthetic store holding the given number of places"""
+    records = {}
+    now = datetime.now()
+
+    def add(cls_name, **attrs):
+        """Adds one record of class cls_name and returns its id"""
+        obj_id = str(uuid4())
+        moment = now - timedelta(seconds=len(records))
+        record = {'id': obj_id, 'created_at': moment.isoformat(),
+                  'updated_at': moment.isoformat(), '__class__': cls_name}
+        record.update(attrs)
+        records['{}.{}'.format(cls_name, obj_id)] = record
+        return obj_id
+
+    states = [add('State', name='State {}'.format(i)) for i in range(50)]
+    cities = [add('City', name='City {}'.format(i),
+                  state_id=states[i % len(states)])
+              for i in range(max(places // 10, 1))]
+    users = [add('User', email='user{}@hbnb.io'.format(i), password='pwd',
+                 first_name='First', last_name='Last')
+             for i in range(max(places // 5, 1))]
+    for i in range(places):
+        place = add('Place', city_id=cities[i % len(cities)],
+                    user_id=users[i % len(users)], name='Place',
+                    description='A nice place', number_rooms=3,
+                    number_bathrooms=1, max_guest=6, price_by_night=120,
+                    latitude=37.77, longitude=-122.41, amenity_ids=[])
+        for j in range(3):
+            add('Review', place_id=place, user_id=users[j % len(users)],
+                text='Great stay')
+    return records
+
+
+def measure(label, save, load, build):
+    """Prints the save, load and load + build times and the size of
+    one format
+    """
+    start = time.perf_counter()
+    data = save()
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    load(data)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    build(data)
+    built = time.perf_counter() - start
+    print('{:<8} save {:6.3f}s  load {:6.3f}s  + build {:6.3f}s  '
+          'size {:11,d} bytes'.format(label, saved, loaded, built,
+                                      len(data)))
+
+
+def main():
+    """Runs the benchmark"""
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    records = make_records(places)
+    print('{:,d} records'.format(len(records)))
+
+    def json_save():
+        """Serializes records as file.json does"""
+        f = io.StringIO()
+        json.dump(records, f)
+        return f.getvalue().encode()
+
+    def binary_save():
+        """Serializes records as file.hbnb does"""
+        f = io.BytesIO()
+        binary_format.dump(records, f)
+        return f.getvalue()
+
+    classes = query.classes()
+
+    def json_build(data):
+        """Builds the objects of file.json as reload() does"""
+        for key, record in json.loads(data).items():
+            classes[record['__class__']](**record)
+
+    def binary_build(data):
+        """Builds the objects of file.hbnb as reload() does"""
+        records = binary_format.load(io.BytesIO(data), datetimes=True)
+        for key, record in records:
+            classes[record['__class__']](**record)
+
+    measure('json', json_save, lambda data: json.loads(data), json_build)
+    measure('binary', binary_save,
+            lambda data: binary_format.load(io.BytesIO(data)), binary_build)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Compares loading file.json with mapping a snapshot
+
+Usage: python3 -m benchmarks.snapshot [number of places]
+
+Writes the synthetic store of benchmarks.file_formats as file.json and
+as a snapshot, then times the startup of FileStorage (reload()) and of
+SnapshotStorage, and a get(), an all(State) and a related() on the
+snapshot, with the growth of the peak resident memory of the process
+each one causes. The snapshot keeps its index in the file, so mapping
+it only reads the directory of the index tables.
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+
+def measure(label, function):
+    """Prints the time and the peak memory growth of function()"""
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    print('{:<25} {:8.4f}s {:10,d} KiB'.format(label, elapsed, growth))
+    return result
+
+
+def main():
+    """Runs the benchmark"""
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    directory = tempfile.TemporaryDirectory()
+    os.chdir(directory.name)
+    from benchmarks.file_formats import make_records
+    from models.engine.file_storage import FileStorage
+    from models.engine.snapshot_format import dump
+    from models.engine.snapshot_storage import SnapshotStorage
+
+    records = make_records(places)
+    with open('file.json', 'w') as f:
+        json.dump(records, f)
+    dump(records, 'file.snap',
+         FileStorage._FileStorage__relations)
+    print('{:,d} records, file.json {:,d} KiB, file.snap {:,d} KiB'.format(
+        len(records), os.path.getsize('file.json') // 1024,
+        os.path.getsize('file.snap') // 1024))
+    key = next(key for key in records if key.startswith('Place.'))
+    city = records[key]['city_id']
+    del records
+
+    measure('FileStorage reload()', FileStorage().reload)
+    FileStorage._FileStorage__objects.clear()
+    snapshot = SnapshotStorage('file.snap')
+    measure('SnapshotStorage map', snapshot.reload)
+    measure('SnapshotStorage get()',
+            lambda: snapshot.get('Place', key.partition('.')[2]))
+    measure('SnapshotStorage all()',
+            lambda: list(snapshot.all('State').values()))
+    measure('SnapshotStorage related()',
+            lambda: snapshot.related('Place', 'city_id', city))
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
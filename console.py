@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """ Console Module """
 import cmd
+from os import getenv
 from shlex import split
 from models import storage
 from datetime import datetime
@@ -90,10 +91,9 @@ class HBNBCommand(cmd.Cmd):
                 raise NameError()
             if len(my_list) < 2:
                 raise IndexError()
-            objects = storage.all()
-            key = my_list[0] + '.' + my_list[1]
-            if key in objects:
-                print(objects[key])
+            obj = storage.get(my_list[0], my_list[1])
+            if obj is not None:
+                print(obj)
             else:
                 raise KeyError()
         except SyntaxError:
@@ -121,11 +121,11 @@ class HBNBCommand(cmd.Cmd):
                 raise NameError()
             if len(my_list) < 2:
                 raise IndexError()
-            objects = storage.all()
-            key = my_list[0] + '.' + my_list[1]
-            if key in objects:
-                del objects[key]
-                storage.save()
+            obj = storage.get(my_list[0], my_list[1])
+            if obj is not None:
+                # one write, whether the engine saves on delete or not
+                with storage.batch():
+                    storage.delete(obj)
             else:
                 raise KeyError()
         except SyntaxError:
@@ -142,20 +142,31 @@ class HBNBCommand(cmd.Cmd):
         Display string representations of all instances of a given class.
         If no class is specified, displays all instantiated objects."""
         if not line:
-            o = storage.all()
-            print([o[k].__str__() for k in o])
+            self.print_list(storage.iter())
             return
         try:
             args = line.split(" ")
             if args[0] not in self.__classes:
                 raise NameError()
 
-            o = storage.all(eval(args[0]))
-            print([o[k].__str__() for k in o])
+            self.print_list(storage.iter(args[0]))
 
         except NameError:
             print("** class doesn't exist **")
 
+    def print_list(self, objects):
+        """prints the string representations of objects as a list,
+        one object at a time
+        Args:
+            objects: iterable of instances
+        """
+        sep = ''
+        print('[', end='')
+        for obj in objects:
+            print(sep + repr(str(obj)), end='')
+            sep = ', '
+        print(']')
+
     def do_update(self, line):
         """Updates an instanceby adding or updating attribute
         Exceptions:
@@ -174,20 +185,18 @@ class HBNBCommand(cmd.Cmd):
                 raise NameError()
             if len(my_list) < 2:
                 raise IndexError()
-            objects = storage.all()
-            key = my_list[0] + '.' + my_list[1]
-            if key not in objects:
+            v = storage.get(my_list[0], my_list[1])
+            if v is None:
                 raise KeyError()
             if len(my_list) < 3:
                 raise AttributeError()
             if len(my_list) < 4:
                 raise ValueError()
-            v = objects[key]
             try:
-                v.__dict__[my_list[2]] = eval(my_list[3])
+                setattr(v, my_list[2], eval(my_list[3]))
             except Exception:
-                v.__dict__[my_list[2]] = my_list[3]
-                v.save()
+                setattr(v, my_list[2], my_list[3])
+            v.save()
         except SyntaxError:
             print("** class name missing **")
         except NameError:
@@ -204,17 +213,11 @@ class HBNBCommand(cmd.Cmd):
     def count(self, line):
         """count the number of instances of a class
         """
-        counter = 0
         try:
             my_list = split(line, " ")
             if my_list[0] not in self.__classes:
                 raise NameError()
-            objects = storage.all()
-            for key in objects:
-                name = key.split('.')
-                if name[0] == my_list[0]:
-                    counter += 1
-            print(counter)
+            print(storage.count(my_list[0]))
         except NameError:
             print("** class doesn't exist **")
 
@@ -258,7 +261,6 @@ class HBNBCommand(cmd.Cmd):
             elif my_list[1][:6] == "update":
                 args = self.strip_clean(my_list)
                 if isinstance(args, list):
-                    obj = storage.all()
                     key = args[0] + ' ' + args[1]
                     for k, v in args[2].items():
                         self.do_update(key + ' "{}" "{}"'.format(k, v))
@@ -269,4 +271,8 @@ class HBNBCommand(cmd.Cmd):
 
 
 if __name__ == '__main__':
-    HBNBCommand().cmdloop()
+    if getenv('HBNB_CONSOLE_BATCH'):
+        with storage.batch():
+            HBNBCommand().cmdloop()
+    else:
+        HBNBCommand().cmdloop()
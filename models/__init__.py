@@ -11,9 +11,20 @@ from os import getenv
 
 if getenv('HBNB_TYPE_STORAGE') == 'db':
     from models.engine.db_storage import DBStorage
-    storage = DBStorage()
+    storage = DBStorage(reload=False)
+elif getenv('HBNB_TYPE_STORAGE') == 'sqlite':
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(reload=False)
+elif getenv('HBNB_TYPE_STORAGE') == 'snapshot':
+    from models.engine.snapshot_storage import SnapshotStorage
+    storage = SnapshotStorage()
 else:
     from models.engine.file_storage import FileStorage
     storage = FileStorage()
 
+if getenv('HBNB_TYPE_STORAGE') in ('db', 'sqlite') and \
+        getenv('HBNB_CACHE_SIZE'):
+    from models.engine.cached_storage import CachedStorage
+    storage = CachedStorage(storage)
+
 storage.reload()
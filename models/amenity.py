@@ -1,13 +1,24 @@
 #!/usr/bin/python3
 """ State Module for HBNB project """
 from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String
+from os import getenv
+from sqlalchemy import Column, ForeignKey, String, Table
 from sqlalchemy.orm import relationship
 
+place_amenity = Table('place_amenity', Base.metadata,
+                      Column('place_id', String(60), ForeignKey('places.id'),
+                             primary_key=True, nullable=False),
+                      Column('amenity_id', String(60),
+                             ForeignKey('amenities.id'),
+                             primary_key=True, nullable=False))
+
 
 class Amenity(BaseModel, Base):
     """The Amenities of a place"""
     __tablename__ = 'amenities'
     name = Column(String(128), nullable=False)
-    place_amenities = relationship("Place", secondary="place_amenity",
-                                   viewonly=False)
+
+    if getenv('HBNB_TYPE_STORAGE') in ('db', 'sqlite'):
+        place_amenities = relationship("Place", secondary="place_amenity",
+                                       back_populates="amenities",
+                                       viewonly=False)
@@ -15,19 +15,46 @@ class BaseModel:
     id = Column(String(60), primary_key=True, unique=True, nullable=False)
     created_at = Column(DateTime(), nullable=False, default=datetime.utcnow())
     updated_at = Column(DateTime(), nullable=False, default=datetime.utcnow())
+
     def __init__(self, *args, **kwargs):
-        """Instatntiates a new model"""
-        self.id = str(uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        """Instatntiates a new model
+
+        The attributes of kwargs are set past __setattr__(): an instance
+        being built is not stored yet, so there is no storage to tell.
+        """
+        build = super().__setattr__
+        if 'id' not in kwargs:
+            build('id', str(uuid4()))
+        if 'created_at' not in kwargs:
+            self.created_at = datetime.now()
+        if 'updated_at' not in kwargs:
+            self.updated_at = datetime.now()
         if kwargs:
             for key, value in kwargs.items():
                 if key == '__class__':
                     continue
                 elif key == "created_at" or key == "updated_at":
-                    setattr(self, key, datetime.fromisoformat(value))
+                    if type(value) is not datetime:
+                        value = datetime.fromisoformat(value)
+                    build(key, value)
                 else:
-                    setattr(self, key, value)
+                    build(key, value)
+
+    def __setattr__(self, name, value):
+        """Sets an attribute and tells the storage the instance changed,
+        and what the attribute held before (Ellipsis when it was unset)
+
+        An instance with no id yet is being built, so it is not stored.
+        """
+        attrs = self.__dict__
+        if 'id' not in attrs:
+            super().__setattr__(name, value)
+            return
+        old = attrs.get(name, ...)
+        super().__setattr__(name, value)
+        touch = getattr(getattr(models, 'storage', None), 'touch', None)
+        if touch is not None:
+            touch(self, name, old)
 
     def __str__(self):
         """Returns a string representation of the instance"""
@@ -1,13 +1,14 @@
 #!/usr/bin/python3
 """ City Module for HBNB project """
 from models.base_model import BaseModel, Base
+from os import getenv
 from sqlalchemy import Column, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
 
 class City(BaseModel, Base):
-    """This is the class for City 
+    """This is the class for City
 
     Attributes:
         state_id (sqlalchemy String): The state id
@@ -16,6 +17,9 @@ class City(BaseModel, Base):
     """
 
     __tablename__ = "cities"
-    state_id = Column(String(60), ForeignKey('states.id'), nullable=False)
+    state_id = Column(String(60), ForeignKey('states.id'), nullable=False,
+                      index=True)
     name = Column(String(128), nullable=False)
-    places = relationship("Place", backref="cities", cascade="delete")
+
+    if getenv('HBNB_TYPE_STORAGE') in ('db', 'sqlite'):
+        places = relationship("Place", backref="cities", cascade="delete")
@@ -0,0 +1,31 @@
+#!/usr/bin/python3
+"""This module defines the atomic replacement of the storage files"""
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def replacing(path, mode='w'):
+    """Yields a temporary file which replaces path once written
+
+    The file is flushed to the disk before it is renamed over path, so
+    that a crash leaves either the old or the new content, never a
+    truncated file; if the block raises, path is left untouched and
+    the temporary file is removed.
+
+    Args:
+        path (str): the file to replace
+        mode (str): 'w' or 'wb'
+    """
+    temp = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(temp, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    finally:
+        try:
+            os.remove(temp)
+        except FileNotFoundError:
+            pass
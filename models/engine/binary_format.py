@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+"""This module defines a compact binary format for FileStorage records
+
+A file starts with MAGIC, followed by one marshal'ed payload::
+
+    [(class_name, fields, rows, keys, sparse), ...]
+
+Each class has its own schema: ``fields`` names the keys present in any
+of its records, ``__class__`` included, and each row is the tuple of
+their JSON values in that order, ``...`` (Ellipsis) standing for a key
+missing from the record, which only happens in the sections marked
+``sparse``.
+
+Every string is stored once: the records share the str object of each
+distinct value (the ids their foreign keys repeat, the timestamps, the
+class names), which marshal writes a single time and refers back to. A
+load is then a marshal.loads() of the rows and one dict() per record,
+without the per-character parsing of JSON.
+
+``keys`` maps the row index to the storage key of the few records whose
+key is not "<class_name>.<id>". The format round-trips losslessly with
+the records of file.json.
+"""
+import gc
+import marshal
+from datetime import datetime
+from itertools import repeat
+
+MAGIC = b'HBNB\x02'
+TIMESTAMPS = ('created_at', 'updated_at')
+
+
+def dump(records, f):
+    """Writes records (a dict of to_dict() by key) to the binary file f"""
+    strings = {}
+    classes = {}
+    for key, record in records.items():
+        classes.setdefault(record['__class__'], []).append((key, record))
+
+    sections = []
+    for name, items in classes.items():
+        fields = {}
+        for key, record in items:
+            fields.update(dict.fromkeys(record))
+        fields = tuple(fields)
+        rows = []
+        keys = {}
+        sparse = False
+        for index, (key, record) in enumerate(items):
+            row = []
+            for field in fields:
+                value = record.get(field, ...)
+                if type(value) is str:
+                    value = strings.setdefault(value, value)
+                elif value is ...:
+                    sparse = True
+                row.append(value)
+            rows.append(tuple(row))
+            record_id = record.get('id')
+            if type(record_id) is not str or key != name + '.' + record_id:
+                keys[index] = key
+        sections.append((name, fields, rows, keys, sparse))
+    f.write(MAGIC)
+    f.write(marshal.dumps(sections, 4))
+
+
+def load(f, datetimes=False):
+    """Returns the (key, to_dict()) records of the binary file f
+
+    The garbage collector is paused while the records are built: they
+    only hold plain values, and collecting meanwhile would walk them
+    again and again. With datetimes, the timestamps are returned as
+    datetime objects, which BaseModel takes as they are, parsing each
+    distinct one once.
+
+    Raises:
+        ValueError: if f is not in this format
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a HBNB binary file')
+    data = f.read()
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        try:
+            sections = marshal.loads(data)
+        except (EOFError, TypeError) as error:
+            raise ValueError('Corrupted HBNB binary file') from error
+        records = []
+        for name, fields, rows, keys, sparse in sections:
+            records.extend(decode_section(name, fields, rows, keys,
+                                          sparse, datetimes))
+        return records
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def decode_section(name, fields, rows, keys, sparse, datetimes=False):
+    """Returns the (key, to_dict()) records of a section of load()"""
+    section = list(map(dict, map(zip, repeat(fields), rows)))
+    if sparse:
+        section = [{field: value for field, value in record.items()
+                    if value is not ...} for record in section]
+    if datetimes:
+        moments = {}
+        for field in TIMESTAMPS:
+            if field not in fields:
+                continue
+            index = fields.index(field)
+            column = [row[index] for row in rows]
+            distinct = {value for value in column
+                        if type(value) is str and value not in moments}
+            moments.update(zip(distinct, map(parse_timestamp, distinct)))
+            for record, value in zip(section, column):
+                if type(value) is str:
+                    record[field] = moments[value]
+    prefix = name + '.'
+    if 'id' in fields:
+        index = fields.index('id')
+        section_keys = [prefix + row[index] if type(row[index]) is str
+                        else None for row in rows]
+    else:
+        section_keys = [None] * len(rows)
+    for index, key in keys.items():
+        section_keys[index] = key
+    return zip(section_keys, section)
+
+
+def parse_timestamp(value):
+    """Returns the datetime of an isoformat() timestamp, or value as it
+    is when it is not one
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+"""This module defines a read-through object cache for DBStorage"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from os import getenv
+from sqlalchemy.exc import InvalidRequestError
+from models.engine import query
+
+
+class CachedStorage:
+    """Answers get(), all(cls), query() and filter() of a DBStorage
+    from memory
+
+    The objects read are kept between requests, so that the state list
+    or a place is not queried and built again by each request. Entries
+    are dropped by least recent use once the cache holds more than size
+    objects, and after ttl seconds so that the changes made by other
+    processes show up. Any write through this storage (new, delete,
+    save, batch, bulk writes) empties the cache.
+
+    The cache keeps the objects as first read, and every hit hands out
+    copies of them merged into the session of the current thread, so
+    their relationships still load and changing them does not change
+    the cache. Every other method is the one of the wrapped storage.
+
+    Attributes:
+        storage (DBStorage): the wrapped storage
+        size (int): the most objects kept, from HBNB_CACHE_SIZE
+        ttl (float): the seconds an entry is kept, from HBNB_CACHE_TTL
+    """
+
+    def __init__(self, storage, size=None, ttl=None):
+        """Instantiates a cache in front of storage"""
+        self.storage = storage
+        if size is None:
+            size = int(getenv('HBNB_CACHE_SIZE', 10000))
+        if ttl is None:
+            ttl = float(getenv('HBNB_CACHE_TTL', 60))
+        self.size = size
+        self.ttl = ttl
+        self.__entries = OrderedDict()
+        self.__objects = 0
+        self.__lock = threading.Lock()
+        self.__stats = {'hits': 0, 'misses': 0, 'evictions': 0,
+                        'expirations': 0, 'invalidations': 0}
+
+    def __getattr__(self, name):
+        """Returns the attribute name of the wrapped storage"""
+        return getattr(self.storage, name)
+
+    def get(self, cls, id):
+        """Returns the object of cls with id, or None"""
+        key = ('get', query.name(cls), id)
+        objects = self.__lookup(key)
+        if objects is not None:
+            return objects[0]
+        obj = self.storage.get(cls, id)
+        if obj is not None:
+            self.__store(key, [obj])
+        return obj
+
+    def all(self, cls=None, load=None):
+        """Returns the objects of cls, by key, or of every class (which
+        is not cached)
+        """
+        if not cls:
+            return self.storage.all(cls, load)
+        key = ('all', query.name(cls), tuple(load or ()))
+        objects = self.__lookup(key)
+        if objects is not None:
+            return {'{}.{}'.format(type(obj).__name__, obj.id): obj
+                    for obj in objects}
+        objects = self.storage.all(cls, load)
+        self.__store(key, list(objects.values()))
+        return objects
+
+    def query(self, cls, order_by=None, limit=None, load=None, **filters):
+        """Returns the objects of cls matching the keyword filters, see
+        DBStorage.query()
+        """
+        return self.filter(cls, query.parse(filters), order_by, limit, load)
+
+    def filter(self, cls, spec, order_by=None, limit=None, load=None):
+        """Returns the objects of cls matching the predicate spec, see
+        DBStorage.filter()
+        """
+        key = ('filter', query.name(cls), self.__frozen(spec),
+               self.__frozen(order_by), limit, tuple(load or ()))
+        try:
+            hash(key)
+        except TypeError:
+            return self.storage.filter(cls, spec, order_by, limit, load)
+        objects = self.__lookup(key)
+        if objects is not None:
+            return {'{}.{}'.format(type(obj).__name__, obj.id): obj
+                    for obj in objects}
+        objects = self.storage.filter(cls, spec, order_by, limit, load)
+        self.__store(key, list(objects.values()))
+        return objects
+
+    def new(self, obj):
+        """Adds obj to the storage"""
+        self.invalidate()
+        self.storage.new(obj)
+
+    def delete(self, obj=None):
+        """Deletes obj from the storage"""
+        self.invalidate()
+        self.storage.delete(obj)
+
+    def save(self):
+        """Commits the storage"""
+        self.storage.save()
+        self.invalidate()
+
+    def batch(self):
+        """Groups writes in one commit, see DBStorage.batch()"""
+        self.invalidate()
+        return self.__writing(self.storage.batch())
+
+    transaction = batch
+
+    def bulk_insert(self, *args, **kwargs):
+        """Inserts rows, see DBStorage.bulk_insert()"""
+        try:
+            return self.storage.bulk_insert(*args, **kwargs)
+        finally:
+            self.invalidate()
+
+    def bulk_upsert(self, *args, **kwargs):
+        """Upserts rows, see DBStorage.bulk_upsert()"""
+        try:
+            return self.storage.bulk_upsert(*args, **kwargs)
+        finally:
+            self.invalidate()
+
+    def reload(self):
+        """Reloads the storage, emptying the cache"""
+        self.invalidate()
+        self.storage.reload()
+
+    def invalidate(self):
+        """Empties the cache"""
+        with self.__lock:
+            if self.__entries:
+                self.__stats['invalidations'] += 1
+            self.__entries.clear()
+            self.__objects = 0
+
+    def cache_stats(self):
+        """Returns the hits, misses, evictions, expirations and
+        invalidations counters and the entries and objects held
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats['entries'] = len(self.__entries)
+            stats['objects'] = self.__objects
+            return stats
+
+    @staticmethod
+    def __frozen(value):
+        """Returns value with its lists and sets made tuples, so that it
+        can be part of an entry key
+        """
+        if isinstance(value, (list, tuple)):
+            return tuple(CachedStorage.__frozen(item) for item in value)
+        if isinstance(value, (set, frozenset)):
+            return frozenset(value)
+        return value
+
+    @contextmanager
+    def __writing(self, batch):
+        """Yields from batch, emptying the cache when it exits"""
+        try:
+            with batch as storage:
+                yield storage
+        finally:
+            self.invalidate()
+
+    def __lookup(self, key):
+        """Returns copies, in the current session, of the objects of the
+        entry key, or None on a miss
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self.__drop(key)
+                self.__stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self.__stats['misses'] += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__stats['hits'] += 1
+        try:
+            return [self.storage.merge(obj) for obj in entry[1]]
+        except InvalidRequestError:
+            # an object changed since it was cached: read it again
+            with self.__lock:
+                if self.__entries.get(key) is entry:
+                    self.__drop(key)
+            return None
+
+    def __store(self, key, objects):
+        """Keeps objects as the entry key, evicting the least recently
+        used entries past size
+        """
+        if len(objects) > self.size:
+            return
+        with self.__lock:
+            if key in self.__entries:
+                self.__drop(key)
+            self.__entries[key] = (time.monotonic() + self.ttl, objects)
+            self.__objects += len(objects)
+            while self.__objects > self.size:
+                self.__drop(next(iter(self.__entries)))
+                self.__stats['evictions'] += 1
+
+    def __drop(self, key):
+        """Removes the entry key"""
+        self.__objects -= len(self.__entries.pop(key)[1])
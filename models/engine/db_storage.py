@@ -7,9 +7,20 @@ from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
-from os import getenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
+from models.engine import query
+from models.engine import migrations
+from models.engine.event_bus import bus, record
+from models.engine.pool import pool_options
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from os import environ, getenv
+import threading
+from uuid import uuid4
+from sqlalchemy import create_engine, event, func, insert, inspect
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import sessionmaker, scoped_session, selectinload
 
 all_classes = {"State", "City", "Amenity", "User", "Place", "Review"}
 
@@ -17,18 +28,58 @@ all_classes = {"State", "City", "Amenity", "User", "Place", "Review"}
 class DBStorage:
     """...
 
+    Each thread (so each request of a threaded server) works in its own
+    session, which close() ends at the end of the request; the sessions
+    take their connections from a pool sized by HBNB_MYSQL_POOL_SIZE,
+    HBNB_MYSQL_MAX_OVERFLOW, HBNB_MYSQL_POOL_RECYCLE and
+    HBNB_MYSQL_POOL_TIMEOUT.
+
     Attributes:
         __engine: The SQLAlchemy engine
-        __session: The SQLAlchemy session
+        __session: The registry of the per-thread SQLAlchemy sessions
+        __local: The per-thread batch depth
+        __executor: The thread pool reading the tables in parallel
+        workers (int): The number of tables all() reads at once, from
+            HBNB_MYSQL_WORKERS (1, reading them one after another, by
+            default)
+        events (EventBus): The bus the committed changes are published
+            on, see models.engine.event_bus
 
     """
 
     __engine = None
     __session = None
+    __factory = None
+    __local = None
+    __executor = None
+    __executor_lock = threading.Lock()
+    events = bus
 
-    def __init__(self):
+    def __init__(self, reload=True):
         """Initialize a connection with MySQL
-        and create tables
+        and create tables, unless reload is False: the tables are then
+        assumed to exist (or left to a later reload())
+        """
+
+        self.__local = threading.local()
+        self.workers = int(getenv('HBNB_MYSQL_WORKERS', 1))
+        self.__engine = self.connect()
+        self.__factory = sessionmaker(bind=self.__engine,
+                                      expire_on_commit=False)
+        self.__session = scoped_session(self.__factory)
+        event.listen(self.__factory, 'after_flush', self.__collect)
+        event.listen(self.__factory, 'after_commit', self.__committed)
+        event.listen(self.__factory, 'after_rollback', self.__discard)
+
+        if getenv('HBNB_ENV') == 'test':
+            Base.metadata.drop_all(self.__engine)
+            migrations.metadata.drop_all(self.__engine)
+
+        if reload:
+            self.reload()
+
+    def connect(self):
+        """Create the SQLAlchemy engine of the MySQL database.
         """
 
         db_uri = "{0}+{1}://{2}:{3}@{4}:3306/{5}".format(
@@ -36,25 +87,213 @@ class DBStorage:
             getenv('HBNB_MYSQL_PWD'), getenv('HBNB_MYSQL_HOST'),
             getenv('HBNB_MYSQL_DB'))
 
-        self.__engine = create_engine(db_uri, pool_pre_ping=True)
-        self.reload()
+        return create_engine(db_uri, pool_pre_ping=True,
+                             **pool_options(environ))
 
-        if getenv('HBNB_ENV') == 'test':
-            Base.metadata.drop_all(self.__engine)
+    def pool_stats(self):
+        """Get the pool occupancy and checkout statistics, see
+        models.engine.pool.MeteredPool.statistics().
+        """
 
-    def all(self, cls=None):
+        statistics = getattr(self.__engine.pool, 'statistics', None)
+        return statistics() if statistics else {}
+
+    def all(self, cls=None, load=None):
         """...
+
+        load names the relationships of cls to load along with it (see
+        loaders()), so that reading them does not query once per object.
         """
         entities = dict()
 
         if cls:
-            return self.get_data_from_table(cls, entities)
+            return self.get_data_from_table(self.model(cls), entities, load)
+
+        # the other sessions would not see the changes not yet flushed
+        session = self.__session()
+        if self.workers > 1 and not (session.new or session.dirty or
+                                     session.deleted):
+            return self.load_tables([eval(entity) for entity in all_classes])
 
         for entity in all_classes:
             entities = self.get_data_from_table(eval(entity), entities)
 
         return entities
 
+    def load_tables(self, tables):
+        """Get the rows of the tables, by key, reading them at the same
+        time.
+
+        Each table is read by a thread of the pool in a session (and so a
+        pooled connection) of its own; its rows are then attached to the
+        session of the calling thread, which keeps the object it already
+        holds for a row, if any.
+        """
+
+        with self.__executor_lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='DBStorage')
+        entities = dict()
+        session = self.__session()
+        identity_map = session.identity_map
+
+        results = self.__executor.map(self.read_table, tables)
+        for cls, rows in zip(tables, results):
+            for row in rows:
+                held = identity_map.get(inspect(row).key)
+                if held is None:
+                    session.add(row)
+                else:
+                    row = held
+                key = "{}.{}".format(cls.__name__, row.id)
+                entities[key] = row
+
+        return entities
+
+    def read_table(self, cls):
+        """Get the rows of cls read in a new session, closed after.
+        """
+
+        session = self.__factory()
+        try:
+            return session.query(cls).all()
+        finally:
+            session.close()
+
+    def query(self, cls, order_by=None, limit=None, load=None, **filters):
+        """Get the objects of cls matching the keyword filters (see
+        models.engine.query), sorted by order_by and at most limit of
+        them, by key.
+        """
+
+        return self.filter(cls, query.parse(filters), order_by, limit, load)
+
+    def filter(self, cls, spec, order_by=None, limit=None, load=None):
+        """Get the objects of cls matching the predicate spec, a list of
+        (attribute, operator, value) tuples, sorted by order_by and at
+        most limit of them, by key.
+
+        The predicates, ordering and limit are compiled into the WHERE,
+        ORDER BY and LIMIT clauses of a single SELECT.
+        """
+
+        cls = self.model(cls)
+        statement = self.__session.query(cls).options(
+            *self.loaders(cls, load))
+        for attr, op, value in query.check(spec):
+            column = getattr(cls, attr)
+            if op == 'in':
+                statement = statement.filter(column.in_(value))
+            else:
+                statement = statement.filter(
+                    query.OPERATORS[op](column, value))
+        for attr, descending in query.ordering(order_by):
+            column = getattr(cls, attr)
+            statement = statement.order_by(
+                column.desc() if descending else column.asc())
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        return {"{}.{}".format(cls.__name__, row.id): row
+                for row in statement}
+
+    def iter(self, cls=None, batch_size=100):
+        """Yield the objects of cls, or of every table, in id order.
+
+        The rows are streamed from a server-side cursor and built
+        batch_size at a time instead of being loaded all at once.
+        """
+
+        if cls:
+            entities = [self.model(cls)]
+        else:
+            entities = [self.model(entity) for entity in sorted(all_classes)]
+
+        for entity in entities:
+            statement = self.__session.query(entity).order_by(entity.id)
+            yield from statement.yield_per(batch_size)
+
+    def page(self, cls, after_id=None, limit=100):
+        """Get the first limit objects of cls whose id comes after
+        after_id (or from the first one), in id order, by key.
+
+        The page is found by its primary key rather than by an OFFSET,
+        so reading page n does not scan the n - 1 pages before it.
+        """
+
+        cls = self.model(cls)
+        statement = self.__session.query(cls)
+        if after_id is not None:
+            statement = statement.filter(cls.id > after_id)
+        statement = statement.order_by(cls.id).limit(limit)
+
+        return {"{}.{}".format(cls.__name__, row.id): row
+                for row in statement}
+
+    def get(self, cls, id):
+        """Get the object of cls with id, or None, by its primary key.
+
+        An object already in the session is returned without a query.
+        """
+
+        return self.__session.get(self.model(cls), id)
+
+    def count(self, cls=None):
+        """Count the rows of cls, or of every table, with SELECT COUNT(*).
+
+        A class with no table, such as BaseModel, has no rows.
+        """
+
+        if cls:
+            if query.name(cls) not in all_classes:
+                return 0
+            cls = self.model(cls)
+            return self.__session.query(func.count(cls.id)).scalar()
+
+        return sum(self.count(entity) for entity in all_classes)
+
+    def loaders(self, cls, load):
+        """Get the loader options of the relationships named in load.
+
+        Each name is a relationship of cls, or a dotted path of them such
+        as 'cities.places'. Every relationship on the path is loaded for
+        all the rows at once by one SELECT ... WHERE ... IN, instead of
+        one SELECT per row when it is first read.
+        """
+
+        options = []
+        for path in load or ():
+            entity, option = cls, None
+            for name in path.split('.'):
+                attr = getattr(entity, name)
+                if option is None:
+                    option = selectinload(attr)
+                else:
+                    option = option.selectinload(attr)
+                entity = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    def merge(self, obj):
+        """Get the object of the current thread's session holding the
+        state of obj, an object loaded by another session, without
+        querying the database.
+        """
+
+        return self.__session.merge(obj, load=False)
+
+    def model(self, cls):
+        """Get the model class of cls, a class or a class name.
+        """
+
+        if type(cls) is str:
+            if cls not in all_classes:
+                raise KeyError(cls)
+            return eval(cls)
+        return cls
+
     def new(self, obj):
         """Add obj to the current database session.
         """
@@ -63,9 +302,125 @@ class DBStorage:
 
     def save(self):
         """Commit all changes to the current database session.
+
+        Inside a batch, the commit is left to the end of the batch.
         """
 
+        if getattr(self.__local, 'batch', 0):
+            return
         self.__session.commit()
+        self.__publish()
+
+    @contextmanager
+    def batch(self):
+        """Group every new/save/delete of the block in one commit.
+
+        The session is committed once when the outermost batch exits
+        normally and rolled back if it exits with an exception.
+        """
+
+        depth = getattr(self.__local, 'batch', 0)
+        self.__local.batch = depth + 1
+        try:
+            yield self
+        except BaseException:
+            if not depth:
+                self.__session.rollback()
+            raise
+        else:
+            if not depth:
+                self.__session.commit()
+                self.__publish()
+        finally:
+            self.__local.batch = depth
+
+    transaction = batch
+
+    def bulk_insert(self, cls, rows, chunk_size=1000):
+        """Insert the rows of cls, dicts shaped like to_dict(), without
+        building any object.
+
+        The rows are read chunk_size at a time and each chunk is sent as
+        one executemany INSERT. Everything is committed at the end,
+        unless inside a batch.
+
+        Return:
+            the number of rows inserted
+        """
+
+        cls = self.model(cls)
+        return self.bulk_write(insert(cls.__table__), cls, rows, chunk_size)
+
+    def bulk_upsert(self, cls, rows, chunk_size=1000):
+        """Insert the rows of cls like bulk_insert(), updating instead
+        the rows whose id is already stored.
+
+        Return:
+            the number of rows written
+        """
+
+        cls = self.model(cls)
+        count = self.bulk_write(self.upsert(cls.__table__), cls, rows,
+                                chunk_size)
+        self.__session.expire_all()
+        return count
+
+    def upsert(self, table):
+        """Get the INSERT ... ON DUPLICATE KEY UPDATE statement of table.
+        """
+
+        statement = mysql.insert(table)
+        return statement.on_duplicate_key_update(
+            {column.name: statement.inserted[column.name]
+             for column in table.columns if not column.primary_key})
+
+    def bulk_write(self, statement, cls, rows, chunk_size):
+        """Execute statement once per chunk of the rows of cls.
+        """
+
+        count = 0
+        chunks = self.chunks(cls, iter(rows), chunk_size)
+        for chunk in chunks:
+            self.__session.execute(statement, chunk)
+            count += len(chunk)
+        self.save()
+        return count
+
+    def chunks(self, cls, rows, chunk_size):
+        """Yield the rows as lists of at most chunk_size dicts holding
+        every column of the table of cls.
+
+        Missing columns take their default, or the current time for the
+        timestamps, and a missing id a new one; keys that are not columns
+        (such as __class__) are dropped.
+        """
+
+        defaults = {}
+        for column in cls.__table__.columns:
+            default = column.default
+            if default is not None and default.is_scalar:
+                defaults[column.name] = default.arg
+            else:
+                defaults[column.name] = None
+
+        while True:
+            chunk = []
+            now = datetime.now()
+            for row in islice(rows, chunk_size):
+                values = dict(defaults)
+                values.update((key, value) for key, value in row.items()
+                              if key in defaults)
+                if 'id' not in row:
+                    values['id'] = str(uuid4())
+                for key in ('created_at', 'updated_at'):
+                    if key not in row:
+                        values[key] = now
+                    elif type(row[key]) is str:
+                        values[key] = datetime.fromisoformat(row[key])
+                chunk.append(values)
+            if not chunk:
+                return
+            yield chunk
 
     def delete(self, obj=None):
         """Delete obj from the current database session.
@@ -75,21 +430,71 @@ class DBStorage:
             self.__session.delete(obj)
 
     def reload(self):
-        """Create all tables into database and initialize a new session.
+        """Create all tables into database and apply the pending schema
+        migrations, unless the schema version says they are current, and
+        start a new session for the current thread.
+        """
+
+        migrations.upgrade(self.__engine, Base.metadata)
+        self.__session.remove()
+
+    def __collect(self, session, context):
+        """Record the objects a flush of session created, updated or
+        deleted, with the attributes it wrote, until its commit.
+        """
+
+        changes = session.info.setdefault('changes', {})
+        written = [(obj, 'created') for obj in session.new]
+        written += [(obj, 'updated') for obj in session.dirty
+                    if session.is_modified(obj)]
+        for obj, kind in written:
+            state = inspect(obj)
+            fields = [attr.key for attr in state.attrs
+                      if attr.history.has_changes()]
+            record(changes, self.__key(obj), kind, fields)
+        for obj in session.deleted:
+            record(changes, self.__key(obj), 'deleted')
+
+    def __committed(self, session):
+        """Keep the changes of the transaction session committed until
+        the commit returns, to publish them.
+        """
+
+        changes = session.info.pop('changes', None)
+        if changes:
+            committed = session.info.setdefault('committed', {})
+            for key, (kind, fields) in changes.items():
+                record(committed, key, kind, fields)
+
+    def __discard(self, session):
+        """Forget the changes of the transaction session rolled back.
+        """
+
+        session.info.pop('changes', None)
+
+    def __publish(self):
+        """Publish the changes committed by the session of the current
+        thread on the events bus, once the commit has returned (so that
+        subscribers may use the storage again).
+        """
+
+        changes = self.__session().info.pop('committed', None)
+        if changes:
+            self.events.publish(changes)
+
+    def __key(self, obj):
+        """Get the storage key of obj.
         """
 
-        Base.metadata.create_all(self.__engine)
-        session_factory = sessionmaker(bind=self.__engine,
-                                       expire_on_commit=False)
-        Session = scoped_session(session_factory)
-        self.__session = Session()
+        return "{}.{}".format(type(obj).__name__, obj.id)
 
-    def get_data_from_table(self, cls, structure):
+    def get_data_from_table(self, cls, structure, load=None):
         """Get the data from a MySQL Table
         """
 
         if type(structure) is dict:
-            query = self.__session.query(cls)
+            query = self.__session.query(cls).options(
+                *self.loaders(cls, load))
 
             for _row in query.all():
                 key = "{}.{}".format(cls.__name__, _row.id)
@@ -98,6 +503,7 @@ class DBStorage:
             return structure
 
     def close(self):
-        """Close the Session
+        """Close the Session of the current thread and discard it, so
+        that its next use (the next request) starts a new one
         """
-        self.__session.close()
+        self.__session.remove()
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+"""This module defines the change events published by the storage engines
+
+Once a save() has written (or committed) its changes, the storage
+publishes one Event per object changed on its EventBus::
+
+    def forget(event):
+        cache.pop('{}.{}'.format(event.cls, event.id), None)
+
+    storage.events.subscribe(forget, kinds=('updated', 'deleted'))
+
+A subscriber is called synchronously, in the thread that saved, or with
+queued=True from a worker thread of its own, in commit order.
+"""
+import queue
+import threading
+import traceback
+from collections import namedtuple
+
+Event = namedtuple('Event', ['kind', 'cls', 'id', 'fields'])
+Event.__doc__ = """A change of one object: kind is 'created', 'updated' or
+'deleted', cls the class name, id the object id and fields the
+frozenset of the attributes set (empty for a deletion)"""
+
+
+def record(changes, key, kind, fields=()):
+    """Folds a change of the object at key into changes, the changes by
+    key a storage has not published yet
+
+    Creating then updating an object is still a creation, creating then
+    deleting it is nothing, and deleting then storing it again is an
+    update.
+    """
+    fields = frozenset(fields)
+    previous = changes.get(key)
+    if previous is None:
+        changes[key] = (kind, fields)
+    elif kind == 'deleted':
+        if previous[0] == 'created':
+            del changes[key]
+        else:
+            changes[key] = (kind, frozenset())
+    elif previous[0] == 'deleted':
+        changes[key] = ('updated', fields)
+    else:
+        changes[key] = (previous[0], previous[1] | fields)
+
+
+class Subscriber:
+    """A callback of an EventBus with the events it wants
+
+    Attributes:
+        callback (function): called with each Event
+        kinds (set): the kinds of events delivered, all when None
+        classes (set): the class names of the events delivered, all when
+            None
+        queued (bool): whether callback runs on a worker thread
+    """
+
+    def __init__(self, callback, queued=False, kinds=None, classes=None):
+        """Instantiates a subscriber, starting its worker if queued"""
+        self.callback = callback
+        self.kinds = set(kinds) if kinds else None
+        self.classes = set(classes) if classes else None
+        self.queued = queued
+        self.__queue = None
+        if queued:
+            self.__queue = queue.Queue()
+            self.__thread = threading.Thread(target=self.__run,
+                                             daemon=True)
+            self.__thread.start()
+
+    def deliver(self, events):
+        """Calls callback with the events it wants, or queues them"""
+        events = [event for event in events
+                  if (self.kinds is None or event.kind in self.kinds) and
+                  (self.classes is None or event.cls in self.classes)]
+        if not events:
+            return
+        if self.__queue is not None:
+            self.__queue.put(events)
+        else:
+            self.__call(events)
+
+    def flush(self):
+        """Waits until the queued events have been delivered"""
+        if self.__queue is not None:
+            self.__queue.join()
+
+    def close(self):
+        """Delivers the queued events and stops the worker"""
+        if self.__queue is not None:
+            self.__queue.put(None)
+            self.__thread.join()
+            self.__queue = None
+
+    def __call(self, events):
+        """Calls callback with each event; an exception is printed and
+        does not stop the others
+        """
+        for event in events:
+            try:
+                self.callback(event)
+            except Exception:
+                traceback.print_exc()
+
+    def __run(self):
+        """Delivers the queued events until close()"""
+        while True:
+            events = self.__queue.get()
+            try:
+                if events is None:
+                    return
+                self.__call(events)
+            finally:
+                self.__queue.task_done()
+
+
+class EventBus:
+    """Delivers the changes committed by a storage to its subscribers"""
+
+    def __init__(self):
+        """Instantiates a bus with no subscriber"""
+        self.__subscribers = ()
+        self.__lock = threading.Lock()
+
+    def subscribe(self, callback, queued=False, kinds=None, classes=None):
+        """Calls callback with each Event of the given kinds and classes
+        (all by default) committed from now on
+
+        Returns:
+            the Subscriber, to pass to unsubscribe()
+        """
+        subscriber = Subscriber(callback, queued, kinds, classes)
+        with self.__lock:
+            self.__subscribers += (subscriber,)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Stops delivering events to subscriber"""
+        with self.__lock:
+            self.__subscribers = tuple(s for s in self.__subscribers
+                                       if s is not subscriber)
+        subscriber.close()
+
+    def publish(self, changes):
+        """Delivers changes, a dict of (kind, fields) by storage key as
+        built by record(), to the subscribers
+        """
+        subscribers = self.__subscribers
+        if not subscribers or not changes:
+            return
+        events = []
+        for key, (kind, fields) in changes.items():
+            name, _, obj_id = key.partition('.')
+            events.append(Event(kind, name, obj_id, fields))
+        for subscriber in subscribers:
+            subscriber.deliver(events)
+
+    def flush(self):
+        """Waits until every queued event has been delivered"""
+        for subscriber in self.__subscribers:
+            subscriber.flush()
+
+
+bus = EventBus()
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""This module defines the lock FileStorage shares between processes"""
+import os
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """Advisory lock and write generation of a storage file shared by
+    several processes
+
+    The lock is an fcntl.flock() of the lock file: writers hold it
+    exclusively, readers share it. The lock file also holds the
+    generation, a counter each writer increments, so that a process
+    tells whether another one wrote since it last read by comparing
+    generations, which costs a single pread().
+
+    flock() locks belong to the open file, so each process opens its own
+    (a forked worker reopens it); within a process, the threads take
+    turns on it, and a thread already holding it keeps it in the mode
+    it was first taken in. Where fcntl does not exist, the lock only
+    excludes the threads of the process.
+
+    Attributes:
+        path (str): path of the lock file
+    """
+
+    def __init__(self, path):
+        """Instantiates the lock of the lock file path"""
+        self.path = path
+        self.__fd = None
+        self.__pid = None
+        self.__depth = 0
+        self.__lock = threading.RLock()
+
+    @contextmanager
+    def hold(self, exclusive=False):
+        """Holds the lock, exclusively or shared, in the block"""
+        with self.__lock:
+            self.__depth += 1
+            try:
+                if self.__depth == 1 and fcntl is not None:
+                    fcntl.flock(self.__file(),
+                                fcntl.LOCK_EX if exclusive else
+                                fcntl.LOCK_SH)
+                yield self
+            finally:
+                self.__depth -= 1
+                if not self.__depth and fcntl is not None:
+                    fcntl.flock(self.__file(), fcntl.LOCK_UN)
+
+    def generation(self):
+        """Returns the generation of the last write"""
+        data = os.pread(self.__file(), 32, 0)
+        return int(data) if data.strip() else 0
+
+    def bump(self):
+        """Increments the generation (holding the lock exclusively) and
+        returns the new one
+        """
+        generation = self.generation() + 1
+        os.pwrite(self.__file(), str(generation).encode(), 0)
+        return generation
+
+    def __file(self):
+        """Returns the descriptor of the lock file of this process"""
+        if self.__pid != os.getpid():
+            self.__fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self.__pid = os.getpid()
+        return self.__fd
@@ -1,68 +1,929 @@
 #!/usr/bin/python3
 """This module defines a class to manage file storage for hbnb clone"""
+import atexit
 import json
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager, nullcontext
+from os import getenv
+from models.engine import binary_format
+from models.engine import query
+from models.engine import snapshot_format
+from models.engine.atomic_file import replacing
+from models.engine.event_bus import bus, record
+from models.engine.file_lock import FileLock
+from models.engine.journal import Journal
+from models.engine.json_stream import iter_items
+from models.engine.rwlock import RWLock
+from models.engine.shard_store import ShardStore
+from models.engine.write_behind import WriteBehind
 
 
 class FileStorage:
-    """This class manages storage of hbnb models in JSON format"""
+    """This class manages storage of hbnb models in JSON format
+
+    With HBNB_FILE_MODE=journal, save() only appends the objects changed
+    since the last save to a log (file.json.log) instead of rewriting
+    the whole file.json, and reload() replays that log over file.json.
+    The log is folded back into file.json by a background compaction
+    once it grows past HBNB_JOURNAL_MAX_BYTES or HBNB_JOURNAL_MAX_RECORDS.
+
+    With HBNB_FILE_MODE=sharded, objects are stored in one file per
+    class (or per hash of the id, see ShardStore) under file.json.d/ and
+    save() only rewrites the shards holding changed objects; export()
+    still writes the plain file.json.
+
+    With HBNB_FILE_FORMAT=binary, the plain layout is saved to file.hbnb
+    in the compact format of models.engine.binary_format instead of
+    file.json; a file.json left from before is still read by reload().
+
+    With HBNB_FILE_WRITE=behind, save() returns at once and the changes
+    are persisted by a background flusher (see WriteBehind), at most
+    HBNB_FLUSH_INTERVAL seconds later; flush() persists them right away,
+    and runs at exit. The flusher leaves out the changes of the open
+    batches, which their own exit saves.
+
+    snapshot() exports the objects to the read-only snapshot that
+    SnapshotStorage (HBNB_TYPE_STORAGE=snapshot) serves to web workers.
+
+    With HBNB_FILE_SHARED=1, several processes (web workers, consoles)
+    may share the files: saves hold an fcntl lock on file.json.lock and
+    first read the changes other processes saved, so none is lost, and
+    reads check the write generation kept in the lock file and only
+    read the files again when another process wrote them (see FileLock).
+    Every process sharing the files must set HBNB_FILE_SHARED.
+
+    Inside a batch() block, save() is deferred: the changes are persisted
+    once when the block exits, or dropped if it exits with an exception.
+    A batch belongs to the thread running it: until it exits, the saves
+    of the other threads write the objects it changed as they were
+    before it.
+
+    file.json is parsed incrementally on reload(). With
+    HBNB_FILE_LOAD=lazy, the records are kept raw, by class, and the
+    model objects of a class are only built the first time that class
+    is read.
+
+    FileStorage is safe to share between threads: changes hold a
+    reader-writer lock exclusively, while reads share it, and all()
+    hands out a copy of the objects, which changing leaves the storage
+    as it is. save() serializes the objects as a reader and
+    writes the file holding no lock, so readers never wait for the disk.
+
+    The serialized form of each object (its to_dict(), and its JSON text
+    for file.json) is cached until the object changes: BaseModel
+    attribute assignments call touch(), so a save only serializes again
+    the objects changed since the previous one.
+
+    """
     __file_path = 'file.json'
+    __binary_path = 'file.hbnb'
     __objects = {}
+    __dirty = set()
+    __deleted = set()
+    __buckets = {}
+    __indexed = None
+    __relations = {
+                    'City': ('state_id',),
+                    'Place': ('city_id', 'user_id', 'amenity_ids'),
+                    'Review': ('place_id', 'user_id')
+                  }
+    __refs = {}
+    __linked = {}
+    __pending = {}
+    __local = threading.local()
+    __batches = {}
+    __cache = {}
+    __text = {}
+    __order = {}
+    __changes = {}
+    __generation = None
+    __stamp = None
+    __lock = RWLock()
+    __save_lock = threading.RLock()
+    events = bus
 
-    def all(self, cls=None):
+    def __init__(self):
+        """Selects the persistence and loading modes"""
+        self.__shared = None
+        if getenv('HBNB_FILE_SHARED'):
+            self.__shared = FileLock(FileStorage.__file_path + '.lock')
+        self.__journal = None
+        self.__shards = None
+        self.__binary = getenv('HBNB_FILE_FORMAT') == 'binary'
+        mode = getenv('HBNB_FILE_MODE')
+        if mode == 'journal':
+            self.__journal = Journal(FileStorage.__file_path,
+                                     lock=self.__shared)
+        elif mode == 'sharded':
+            self.__shards = ShardStore(FileStorage.__file_path + '.d')
+        self.__lazy = getenv('HBNB_FILE_LOAD') == 'lazy'
+        self.__behind = None
+        if getenv('HBNB_FILE_WRITE') == 'behind':
+            self.__behind = WriteBehind(self.__flush)
+            atexit.register(self.__behind.close)
+
+    def all(self, cls=None, load=None):
         """Returns all the objects
 
-        If a class is specified, the method only
-        returns the objects of same type.
+        If a class (or a class name) is specified, the method only
+        returns the objects of same type, read from its class bucket.
+        The load hints of DBStorage are not needed here: relationships
+        are answered from the reverse indexes.
+
+        """
+
+        if cls:
+            name = query.name(cls)
+            self.__prepare(name)
+            with FileStorage.__lock.read():
+                return dict(FileStorage.__buckets.get(name, {}))
+
+        self.__prepare()
+        with FileStorage.__lock.read():
+            return dict(FileStorage.__objects)
+
+    def get(self, cls, id):
+        """Returns the object of cls (or class name) with id, or None
 
+        When lazily loaded, only the record of that object is built.
         """
+        name = query.name(cls)
+        key = '{}.{}'.format(name, id)
+        self.__refresh()
+        if key in FileStorage.__pending.get(name, ()) or self.__stale():
+            classes = query.classes()
+            with FileStorage.__lock.write():
+                self.__sync()
+                records = FileStorage.__pending.get(name, {})
+                record = records.pop(key, None)
+                if record is not None:
+                    self.__add(key, classes[name](**record))
+                if not records:
+                    FileStorage.__pending.pop(name, None)
+        with FileStorage.__lock.read():
+            return FileStorage.__buckets.get(name, {}).get(key)
 
+    def count(self, cls=None):
+        """Returns the number of objects (of cls or class name, if
+        given) from the bucket sizes, without building lazy records
+        """
+        self.__refresh()
+        if self.__stale():
+            with FileStorage.__lock.write():
+                self.__sync()
+        with FileStorage.__lock.read():
+            if cls:
+                name = query.name(cls)
+                return len(FileStorage.__buckets.get(name, ())) + \
+                    len(FileStorage.__pending.get(name, ()))
+            return len(FileStorage.__objects) + \
+                sum(map(len, FileStorage.__pending.values()))
+
+    def iter(self, cls=None, batch_size=100):
+        """Yields the objects of cls (or class name), or of every class,
+        in id order, holding the storage lock batch_size objects at a
+        time; objects deleted meanwhile are skipped
+        """
         if cls:
-            same_type = dict()
+            names = [query.name(cls)]
+        else:
+            self.__prepare()
+            with FileStorage.__lock.read():
+                names = sorted(FileStorage.__buckets)
+        for name in names:
+            after = None
+            while True:
+                objects = self.page(name, after, batch_size)
+                yield from objects.values()
+                if len(objects) < batch_size:
+                    break
+                after = next(reversed(objects)).partition('.')[2]
+
+    def page(self, cls, after_id=None, limit=100):
+        """Returns the first limit objects of cls (or class name) whose
+        id comes after after_id (or from the first one), in id order, by
+        key
+        """
+        name = query.name(cls)
+        self.__prepare(name)
+        with FileStorage.__lock.read():
+            bucket = FileStorage.__buckets.get(name, {})
+            order = FileStorage.__order.get(name)
+            if order is None:
+                order = sorted(bucket)
+                FileStorage.__order[name] = order
+            start = 0
+            if after_id is not None:
+                start = bisect_right(order, '{}.{}'.format(name, after_id))
+            return {key: bucket[key] for key in order[start:start + limit]}
+
+    def related(self, cls, attr, value):
+        """Returns the objects of cls whose attr is (or, for a list
+        attribute such as amenity_ids, contains) value
+
+        Foreign keys listed in __relations are answered from a reverse
+        index, any other attribute by scanning the class bucket.
+
+        """
+        name = query.name(cls)
+        self.__prepare(name)
+        with FileStorage.__lock.read():
+            if attr in FileStorage.__relations.get(name, ()):
+                refs = FileStorage.__refs.get((name, attr), {})
+                return dict(refs.get(value, {}))
+            return {key: obj for key, obj in
+                    FileStorage.__buckets.get(name, {}).items()
+                    if getattr(obj, attr, None) == value}
+
+    def query(self, cls, order_by=None, limit=None, load=None, **filters):
+        """Returns the objects of cls matching the keyword filters (see
+        models.engine.query), sorted by order_by and at most limit of
+        them, by key
+        """
+        return self.filter(cls, query.parse(filters), order_by, limit)
 
-            for key, obj in self.__objects.items():
-                if obj.__class__ == cls:
-                    same_type[key] = obj
+    def filter(self, cls, spec, order_by=None, limit=None, load=None):
+        """Returns the objects of cls matching the predicate spec, a list
+        of (attribute, operator, value) tuples, sorted by order_by and at
+        most limit of them, by key
 
-            return same_type
+        An equality or 'in' predicate on the id or on a foreign key listed
+        in __relations only looks at the objects found by its index; the
+        other predicates are checked on those (or on the class bucket).
 
-        return self.__objects
+        """
+        spec = query.check(spec)
+        name = query.name(cls)
+        self.__prepare(name)
+        with FileStorage.__lock.read():
+            candidates = self.__candidates(name, spec)
+            found = [(key, obj) for key, obj in candidates.items()
+                     if query.matches(obj, spec)]
+        return query.select(found, order_by, limit)
+
+    def __candidates(self, name, spec):
+        """Returns the objects of the class name that may match spec,
+        from the narrowest index its predicates can use
+        """
+        bucket = FileStorage.__buckets.get(name, {})
+        best = None
+        for attr, op, value in spec:
+            if op not in ('eq', 'in'):
+                continue
+            values = value if op == 'in' else [value]
+            if attr == 'id':
+                keys = ('{}.{}'.format(name, obj_id) for obj_id in values)
+                found = {key: bucket[key] for key in keys if key in bucket}
+            elif attr in FileStorage.__relations.get(name, ()):
+                refs = FileStorage.__refs.get((name, attr), {})
+                found = {}
+                for ref in values:
+                    try:
+                        found.update(refs.get(ref, {}))
+                    except TypeError:
+                        pass
+            else:
+                continue
+            if best is None or len(found) < len(best):
+                best = found
+        return bucket if best is None else best
+
+    def __prepare(self, name=None):
+        """Builds what a read of the class name (or of every class)
+        needs: the records a lazy reload kept raw, and the buckets when
+        __objects was changed directly
+        """
+        self.__refresh()
+        pending = FileStorage.__pending
+        if (name in pending if name else pending) or self.__stale():
+            with FileStorage.__lock.write():
+                self.__materialize(name)
+                self.__sync()
+
+    def __stale(self):
+        """Tells if __objects was replaced or changed directly instead
+        of through new() and delete()
+        """
+        objects = FileStorage.__objects
+        return objects is not FileStorage.__indexed or \
+            len(objects) != sum(map(len, FileStorage.__buckets.values()))
+
+    def __sync(self):
+        """Rebuilds the class buckets and reverse indexes when __objects
+        was replaced or changed directly instead of through new() and
+        delete()
+        """
+        objects = FileStorage.__objects
+        if self.__stale():
+            FileStorage.__cache = {}
+            FileStorage.__text = {}
+            FileStorage.__order = {}
+            buckets = {}
+            for key, obj in objects.items():
+                buckets.setdefault(type(obj).__name__, {})[key] = obj
+            FileStorage.__buckets = buckets
+            FileStorage.__indexed = objects
+            FileStorage.__refs = {}
+            FileStorage.__linked = {}
+            for key, obj in objects.items():
+                self.__link(key, obj)
+
+    def __link(self, key, obj):
+        """Moves obj to the reverse index entries of its current
+        foreign key values
+        """
+        name = type(obj).__name__
+        attrs = FileStorage.__relations.get(name)
+        if not attrs:
+            return
+        linked = FileStorage.__linked.setdefault(key, {})
+        for attr in attrs:
+            value = getattr(obj, attr, None)
+            if type(value) is list:
+                values = frozenset(value)
+            else:
+                values = frozenset((value,))
+            old = linked.get(attr, frozenset())
+            if values == old:
+                continue
+            refs = FileStorage.__refs.setdefault((name, attr), {})
+            for value in old - values:
+                refs[value].pop(key, None)
+                if not refs[value]:
+                    del refs[value]
+            for value in values - old:
+                refs.setdefault(value, {})[key] = obj
+            linked[attr] = values
+
+    def __unlink(self, key, obj):
+        """Removes obj from the reverse indexes"""
+        name = type(obj).__name__
+        for attr, values in FileStorage.__linked.pop(key, {}).items():
+            refs = FileStorage.__refs[(name, attr)]
+            for value in values:
+                refs[value].pop(key, None)
+                if not refs[value]:
+                    del refs[value]
+
+    def __add(self, key, obj):
+        """Puts obj in __objects, its class bucket and the reverse
+        indexes
+        """
+        name = type(obj).__name__
+        old = FileStorage.__objects.get(key)
+        if old is not None and old is not obj:
+            self.__unlink(key, old)
+        bucket = FileStorage.__buckets.setdefault(name, {})
+        if key not in bucket and name in FileStorage.__order:
+            insort(FileStorage.__order[name], key)
+        FileStorage.__objects[key] = obj
+        bucket[key] = obj
+        self.__link(key, obj)
+        FileStorage.__cache.pop(key, None)
+        FileStorage.__text.pop(key, None)
+
+    def __materialize(self, name=None):
+        """Builds the objects of the records a lazy reload kept raw,
+        for the class name or for every class
+        """
+        if not FileStorage.__pending:
+            return
+        if name is None:
+            names = list(FileStorage.__pending)
+        else:
+            names = [name]
+        classes = query.classes()
+        self.__sync()
+        for name in names:
+            records = FileStorage.__pending.pop(name, None)
+            if records:
+                cls = classes[name]
+                for key, val in records.items():
+                    self.__add(key, cls(**val))
 
     def new(self, obj):
         """Adds new object to storage dictionary"""
-        self.all().update({obj.to_dict()['__class__'] + '.' + obj.id: obj})
+        name = type(obj).__name__
+        key = name + '.' + obj.id
+        with FileStorage.__lock.write():
+            self.__sync()
+            undo = self.__batch()
+            if undo is not None:
+                self.__materialize(name)
+                self.__remember(undo, key)
+            dirty, deleted, changes = self.__log()
+            if key in FileStorage.__objects or \
+                    key in FileStorage.__pending.get(name, ()):
+                # storing obj again adds no field to the ones touched
+                fields = () if FileStorage.__objects.get(key) is obj \
+                    else self.__fields(obj)
+                record(changes, key, 'updated', fields)
+            else:
+                record(changes, key, 'created', self.__fields(obj))
+            if name in FileStorage.__pending:
+                FileStorage.__pending[name].pop(key, None)
+            self.__add(key, obj)
+            deleted.discard(key)
+            dirty.add(key)
+
+    def bulk_insert(self, cls, rows):
+        """Stores the objects of cls (or class name) built from rows,
+        dicts shaped like to_dict(), and saves them all at once; a stored
+        object with the same key is replaced
+
+        Returns:
+            the number of objects stored
+        """
+        if type(cls) is str:
+            cls = query.classes()[cls]
+        objects = [cls(**row) for row in rows]
+        with self.batch():
+            with FileStorage.__lock.write():
+                for obj in objects:
+                    self.new(obj)
+        return len(objects)
+
+    bulk_upsert = bulk_insert
+
+    def touch(self, obj, name=None, old=...):
+        """Marks a stored obj as changed (its attribute name was set,
+        and held old before, Ellipsis meaning unset): its cached
+        serialization is dropped, its reverse index entries follow its
+        foreign keys and the next save() writes it
+        """
+        obj_id = obj.__dict__.get('id')
+        if type(obj_id) is not str:
+            return
+        key = type(obj).__name__ + '.' + obj_id
+        if FileStorage.__objects.get(key) is not obj:
+            return
+        with FileStorage.__lock.write():
+            undo = self.__batch()
+            if undo is not None and key not in undo:
+                attrs = self.__attrs(obj)
+                if name is not None:
+                    if old is ...:
+                        attrs.pop(name, None)
+                    else:
+                        attrs[name] = old
+                undo[key] = (obj, attrs)
+            dirty, deleted, changes = self.__log()
+            FileStorage.__cache.pop(key, None)
+            FileStorage.__text.pop(key, None)
+            dirty.add(key)
+            self.__link(key, obj)
+            record(changes, key, 'updated', () if name is None else (name,))
+
+    def __batch(self):
+        """Returns the undo log of the batch the calling thread runs, or
+        None outside a batch
+        """
+        return getattr(FileStorage.__local, 'undo', None)
+
+    def __log(self):
+        """Returns the dirty keys, deleted keys and changes to record
+        the changes of the calling thread in: those of its batch, if it
+        runs one
+        """
+        local = FileStorage.__local
+        if getattr(local, 'undo', None) is not None:
+            return local.dirty, local.deleted, local.changes
+        return FileStorage.__dirty, FileStorage.__deleted, \
+            FileStorage.__changes
+
+    def __remember(self, undo, key):
+        """Keeps in the undo log of a batch what key held before the
+        batch changed it: the object and its attributes
+        """
+        if key not in undo:
+            obj = FileStorage.__objects.get(key)
+            undo[key] = (obj, obj and self.__attrs(obj))
+
+    @staticmethod
+    def __attrs(obj):
+        """Returns a copy of the attributes of obj"""
+        return {name: value for name, value in obj.__dict__.items()
+                if name != '_sa_instance_state'}
+
+    @staticmethod
+    def __restore(obj, attrs):
+        """Puts back the attributes of obj __attrs() copied, without
+        touching it
+        """
+        for name in [name for name in obj.__dict__
+                     if name != '_sa_instance_state' and name not in attrs]:
+            del obj.__dict__[name]
+        obj.__dict__.update(attrs)
+
+    def __remove(self, key):
+        """Takes the object at key out of __objects, its class bucket
+        and the reverse indexes
+        """
+        obj = FileStorage.__objects.pop(key)
+        name = type(obj).__name__
+        del FileStorage.__buckets[name][key]
+        order = FileStorage.__order.get(name)
+        if order is not None:
+            del order[bisect_left(order, key)]
+        self.__unlink(key, obj)
+        FileStorage.__cache.pop(key, None)
+        FileStorage.__text.pop(key, None)
+
+    @contextmanager
+    def batch(self):
+        """Buffers new(), save() and delete() until the block exits
+
+        The changes are saved once when the outermost batch exits
+        normally; if it exits with an exception, __objects and the
+        attributes of the objects changed are put back as they were and
+        nothing is saved.
+
+        The batch only holds the changes of the calling thread, which
+        it keeps apart, with the undo log, until it exits.
+        """
+        local = FileStorage.__local
+        if self.__batch() is not None:
+            yield self
+            return
+        ident = threading.get_ident()
+        with FileStorage.__lock.write():
+            self.__sync()
+            local.undo = {}
+            local.dirty, local.deleted, local.changes = set(), set(), {}
+            FileStorage.__batches[ident] = local.undo
+        try:
+            yield self
+        except BaseException:
+            with FileStorage.__lock.write():
+                undo, local.undo = local.undo, None
+                del FileStorage.__batches[ident]
+                for key, (obj, attrs) in undo.items():
+                    if key in FileStorage.__objects:
+                        self.__remove(key)
+                    if obj is not None:
+                        self.__restore(obj, attrs)
+                        self.__add(key, obj)
+            raise
+        with FileStorage.__lock.write():
+            local.undo = None
+            del FileStorage.__batches[ident]
+            FileStorage.__dirty -= local.deleted
+            FileStorage.__dirty |= local.dirty
+            FileStorage.__deleted -= local.dirty
+            FileStorage.__deleted |= local.deleted
+            for key, (kind, fields) in local.changes.items():
+                record(FileStorage.__changes, key, kind, fields)
+        self.save()
+
+    transaction = batch
 
     def save(self):
-        """Saves storage dictionary to file"""
-        with open(FileStorage.__file_path, 'w') as f:
-            temp = {}
-            temp.update(FileStorage.__objects)
-            for key, val in temp.items():
-                temp[key] = val.to_dict()
-            json.dump(temp, f)
+        """Saves storage dictionary to file, then publishes the changes
+        saved on the events bus
+
+        In write-behind mode, the changes are left to the flusher unless
+        HBNB_FLUSH_MAX_CHANGES of them are pending.
+        """
+        if self.__batch() is not None:
+            return
+        if self.__behind is not None:
+            pending = len(FileStorage.__dirty) + len(FileStorage.__deleted)
+            if self.__behind.defer(pending):
+                return
+        self.__persist()
+
+    def flush(self):
+        """Persists the changes a write-behind save() deferred"""
+        if self.__behind is not None:
+            self.__behind.flush()
+
+    def write_behind_stats(self):
+        """Returns the statistics of the write-behind flusher, None
+        when saves are not deferred
+        """
+        if self.__behind is not None:
+            return dict(self.__behind.stats)
+
+    def __flush(self):
+        """Persists the deferred changes, if any"""
+        if FileStorage.__dirty or FileStorage.__deleted:
+            self.__persist()
+
+    def __persist(self):
+        """Writes the changes to the disk and publishes them"""
+        with FileStorage.__save_lock, self.__hold(exclusive=True):
+            self.__merge()
+            with FileStorage.__lock.write():
+                dirty, deleted = FileStorage.__dirty, FileStorage.__deleted
+                FileStorage.__dirty, FileStorage.__deleted = set(), set()
+                changes = FileStorage.__changes
+                FileStorage.__changes = {}
+            try:
+                with FileStorage.__lock.read():
+                    payload = self.__serialize(dirty, deleted)
+                self.__write(payload, deleted)
+                FileStorage.__stamp = self.__files()
+                if self.__shared is not None:
+                    FileStorage.__generation = self.__shared.bump()
+            except BaseException:
+                with FileStorage.__lock.write():
+                    FileStorage.__dirty |= dirty - FileStorage.__deleted
+                    FileStorage.__deleted |= deleted - FileStorage.__dirty
+                    newer = FileStorage.__changes
+                    FileStorage.__changes = changes
+                    for key, (kind, fields) in newer.items():
+                        record(changes, key, kind, fields)
+                raise
+        self.events.publish(changes)
+
+    def __hold(self, exclusive=False):
+        """Returns the context holding the lock shared with the other
+        processes, if any
+        """
+        if self.__shared is None:
+            return nullcontext()
+        return self.__shared.hold(exclusive)
+
+    def __refresh(self):
+        """Reads the changes other processes saved since this one last
+        read or wrote the files, when they are shared
+        """
+        shared = self.__shared
+        if shared is None or self.__batch() is not None or \
+                shared.generation() == FileStorage.__generation:
+            return
+        with shared.hold():
+            self.__merge()
+
+    def __merge(self):
+        """Loads the files again if another process wrote them, keeping
+        the changes not saved yet (the lock is held by the caller)
+        """
+        if self.__shared is None:
+            return
+        generation = self.__shared.generation()
+        if generation == FileStorage.__generation:
+            return
+        classes = query.classes()
+        with FileStorage.__lock.write():
+            self.__sync()
+            keep = FileStorage.__dirty | FileStorage.__deleted
+            keep = keep.union(*FileStorage.__batches.values())
+            try:
+                found = self.__read(classes, keep)
+            except FileNotFoundError:
+                found = set()
+            for key in list(FileStorage.__objects):
+                if key not in found and key not in keep:
+                    self.__remove(key)
+            for records in FileStorage.__pending.values():
+                for key in [key for key in records if key not in found]:
+                    del records[key]
+        FileStorage.__generation = generation
+
+    def __fields(self, obj):
+        """Returns the names of the attributes set on obj"""
+        return [name for name in obj.__dict__
+                if name != '_sa_instance_state']
+
+    def __serialize(self, dirty, deleted):
+        """Returns what the persistence mode needs to save the changes
+
+        The objects the open batches changed are saved as they were
+        before the batches (see __hidden()).
+        """
+        objects = FileStorage.__objects
+        hidden = self.__hidden()
+        if self.__journal:
+            return {key: hidden[key] if key in hidden else
+                    self.__record(key) for key in dirty
+                    if hidden.get(key, key in objects)}
+        if self.__shards:
+            pending = FileStorage.__pending
+            changed = [key for key in dirty if hidden.get(
+                key, key in objects or
+                key in pending.get(key.split('.')[0], ()))]
+            shards = self.__shards.plan(changed, deleted)
+            return {name: {key: hidden[key] if key in hidden else
+                           self.__record(key) for key in keys
+                           if hidden.get(key, True)}
+                    for name, keys in shards.items()}
+        if self.__binary:
+            return self.__records(hidden)
+        return self.__fragments(hidden)
+
+    def __hidden(self):
+        """Returns the to_dict() the objects the open batches changed
+        had before them, by key (None for the objects they created)
+        """
+        hidden = {}
+        for undo in FileStorage.__batches.values():
+            for key, (obj, attrs) in undo.items():
+                if key not in hidden:
+                    hidden[key] = obj and self.__dump(obj, attrs)
+        return hidden
+
+    @staticmethod
+    def __dump(obj, attrs):
+        """Returns the to_dict() obj had with the attributes attrs"""
+        output = dict(attrs)
+        output['__class__'] = type(obj).__name__
+        for name in ('created_at', 'updated_at'):
+            if name in output:
+                output[name] = output[name].isoformat()
+        return output
+
+    def __write(self, payload, deleted):
+        """Writes a payload of __serialize() to the disk"""
+        if self.__journal:
+            self.__journal.append(payload, deleted)
+        elif self.__shards:
+            self.__shards.write(payload)
+        elif self.__binary:
+            with replacing(FileStorage.__binary_path, 'wb') as f:
+                binary_format.dump(payload, f)
+        else:
+            with replacing(FileStorage.__file_path) as f:
+                f.write('{' + ', '.join(payload) + '}')
+
+    def __record(self, key):
+        """Returns the to_dict() of the object (or raw record) at key,
+        from the cache while the object is unchanged
+        """
+        record = FileStorage.__cache.get(key)
+        if record is None:
+            if key not in FileStorage.__objects:
+                return FileStorage.__pending[key.split('.')[0]][key]
+            record = FileStorage.__objects[key].to_dict()
+            FileStorage.__cache[key] = record
+        return record
+
+    def __fragments(self, hidden):
+        """Returns the '"<key>": <to_dict() as JSON>' text of every
+        object, which joined by ', ' make up file.json, with the records
+        of hidden in place of the objects at their keys
+        """
+        fragments = []
+        for records in FileStorage.__pending.values():
+            for key, record in records.items():
+                fragments.append(json.dumps(key) + ': ' + json.dumps(record))
+        for key, record in hidden.items():
+            if record is not None:
+                fragments.append(json.dumps(key) + ': ' + json.dumps(record))
+        text = FileStorage.__text
+        for key in FileStorage.__objects:
+            if key in hidden:
+                continue
+            fragment = text.get(key)
+            if fragment is None:
+                fragment = json.dumps(key) + ': ' + \
+                    json.dumps(self.__record(key))
+                text[key] = fragment
+            fragments.append(fragment)
+        return fragments
+
+    def export(self, path=None):
+        """Writes every object to path (file.json by default) in the
+        plain JSON format, whatever the persistence mode
+        """
+        self.__prepare()
+        with FileStorage.__lock.read():
+            records = self.__records({})
+        with replacing(path or FileStorage.__file_path) as f:
+            json.dump(records, f)
+
+    def snapshot(self, path=None):
+        """Writes every object to path (HBNB_SNAPSHOT_PATH, or file.snap
+        by default) as the indexed, read-only snapshot SnapshotStorage
+        serves, with the reverse indexes of the __relations
+        """
+        self.__prepare()
+        with FileStorage.__lock.read():
+            records = self.__records({})
+        snapshot_format.dump(records, path or getenv('HBNB_SNAPSHOT_PATH',
+                                                     'file.snap'),
+                             FileStorage.__relations)
+
+    def __records(self, hidden):
+        """Returns the to_dict() of every object (or raw record) by key,
+        those of hidden in place of the objects at their keys
+        """
+        temp = {}
+        for records in FileStorage.__pending.values():
+            temp.update(records)
+        for key in FileStorage.__objects:
+            if key not in hidden:
+                temp[key] = self.__record(key)
+        for key, record in hidden.items():
+            if record is not None:
+                temp[key] = record
+        return temp
 
     def reload(self):
-        """Loads storage dictionary from file"""
-        from models.base_model import BaseModel
-        from models.user import User
-        from models.place import Place
-        from models.state import State
-        from models.city import City
-        from models.amenity import Amenity
-        from models.review import Review
-
-        classes = {
-                    'BaseModel': BaseModel, 'User': User, 'Place': Place,
-                    'State': State, 'City': City, 'Amenity': Amenity,
-                    'Review': Review
-                  }
-        try:
-            temp = {}
-            with open(FileStorage.__file_path, 'r') as f:
-                temp = json.load(f)
-                for key, val in temp.items():
-                        self.all()[key] = classes[val['__class__']](**val)
-        except FileNotFoundError:
-            pass
+        """Loads storage dictionary from file, once the deferred
+        changes are written
+        """
+        self.flush()
+        classes = query.classes()
+        with self.__hold():
+            if self.__shared is not None:
+                FileStorage.__generation = self.__shared.generation()
+            with FileStorage.__lock.write():
+                self.__sync()
+                FileStorage.__stamp = self.__files()
+                try:
+                    self.__read(classes)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        """Reads the files again, as the end of a request does for the
+        database session, but only if they were written since this
+        process last read or wrote them: by another process, when they
+        are shared, or by any other means otherwise; the objects that
+        did not change are kept as they are
+        """
+        if self.__shared is not None:
+            self.__refresh()
+        elif self.__files() != FileStorage.__stamp:
+            self.reload()
+
+    def __files(self):
+        """Returns the size, modification time and inode of the files
+        of the persistence mode, which change when they are written
+        """
+        if self.__journal:
+            paths = (FileStorage.__file_path, self.__journal.path,
+                     self.__journal.rotated)
+        elif self.__shards:
+            paths = (self.__shards.directory, FileStorage.__file_path)
+        elif self.__binary:
+            paths = (FileStorage.__binary_path, FileStorage.__file_path)
+        else:
+            paths = (FileStorage.__file_path,)
+        stamp = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stamp.append(None)
+            else:
+                stamp.append((stat.st_size, stat.st_mtime_ns, stat.st_ino))
+        return tuple(stamp)
+
+    def __read(self, classes, keep=()):
+        """Loads the files of the persistence mode, except the keys in
+        keep
+
+        Returns:
+            the set of the keys read
+        """
+        if self.__journal:
+            return self.__load(self.__journal.load().items(), classes, keep)
+        if self.__shards and self.__shards.exists():
+            return self.__load(self.__shards.load(), classes, keep)
+        if self.__binary and os.path.exists(FileStorage.__binary_path):
+            with open(FileStorage.__binary_path, 'rb') as f:
+                # lazy records stay raw, so their timestamps stay strings,
+                # as do the records compared with the objects built
+                records = binary_format.load(
+                    f, datetimes=not self.__lazy and not FileStorage.__objects)
+                return self.__load(records, classes, keep)
+        with open(FileStorage.__file_path, 'r') as f:
+            found = self.__load(iter_items(f), classes, keep)
+        if self.__shards:
+            # first sharded save splits the plain file.json
+            FileStorage.__dirty.update(FileStorage.__objects)
+            for records in FileStorage.__pending.values():
+                FileStorage.__dirty.update(records)
+        return found
+
+    def __load(self, records, classes, keep=()):
+        """Builds, or keeps raw when lazy, the (key, to_dict()) records
+        but those whose key is in keep, and those of the objects already
+        built and saved just as the record
+
+        Returns:
+            the set of the keys read
+        """
+        objects = FileStorage.__objects
+        dirty = FileStorage.__dirty
+        found = set()
+        for key, val in records:
+            found.add(key)
+            if key in keep:
+                continue
+            if key in objects and key not in dirty and \
+                    self.__record(key) == val:
+                continue
+            name = val['__class__']
+            if self.__lazy and key not in FileStorage.__objects:
+                FileStorage.__pending.setdefault(name, {})[key] = val
+            else:
+                self.__add(key, classes[name](**val))
+        return found
 
     def delete(self, obj=None):
         """Delete obj from __objects if it's inside
@@ -70,6 +931,36 @@ class FileStorage:
         if obj:
             key = "{}.{}".format(type(obj).__name__, obj.id)
 
-            if self.__objects[key]:
-                del self.__objects[key]
-                self.save()
+            with FileStorage.__lock.write():
+                self.__materialize(type(obj).__name__)
+                self.__sync()
+                if FileStorage.__objects[key]:
+                    undo = self.__batch()
+                    if undo is not None:
+                        self.__remember(undo, key)
+                    dirty, deleted, changes = self.__log()
+                    self.__remove(key)
+                    dirty.discard(key)
+                    deleted.add(key)
+                    record(changes, key, 'deleted')
+            self.save()
+
+    def compact(self):
+        """Folds the journal into a fresh file.json right away
+
+        Returns:
+            the compaction statistics, None when not journaled
+        """
+        if self.__journal:
+            self.__journal.compact()
+            return self.compaction_stats()
+
+    def compaction_stats(self):
+        """Returns the statistics of the journal compactions
+
+        The dict holds the number of runs, the last and total durations
+        in seconds, the bytes reclaimed, the records dropped and the last
+        error; it is None when FileStorage is not journaled.
+        """
+        if self.__journal:
+            return dict(self.__journal.stats)
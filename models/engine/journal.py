@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+"""This module defines the append-only journal used by FileStorage"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from os import getenv
+
+
+class Journal:
+    """Append-only log of the changes made to a FileStorage
+
+    Each line of the log is one compact JSON record, either an upsert
+    ``["+", key, obj_dict]`` or a tombstone ``["-", key]``. The log is
+    replayed over the last snapshot (file.json) on reload.
+
+    Once the log passes max_bytes or max_records, it is folded into a
+    fresh snapshot by a background thread: the log is first renamed to
+    ``<log>.1`` so writers can go on appending to a new log, then the
+    snapshot plus the rotated log are written to a temporary file that
+    replaces the snapshot with an atomic rename. The temporary file is
+    removed if the compaction fails, and at exit, close() lets a running
+    compaction finish rather than leave one behind.
+
+    When the files are shared by several processes, the compaction holds
+    their FileLock exclusively for the rotation of the log and for the
+    replacement of the snapshot, so that it never moves the log under
+    the append of another process, nor folds a log another process
+    already folded.
+
+    Attributes:
+        snapshot (str): path of the snapshot file
+        path (str): path of the log file
+        rotated (str): path of the log being compacted
+        max_bytes (int): log size that triggers a compaction
+        max_records (int): log length that triggers a compaction
+        records (int): number of records in the current log
+        stats (dict): compaction statistics
+        lock (FileLock): lock of the files shared with other processes,
+            or None
+    """
+
+    UPSERT = '+'
+    TOMBSTONE = '-'
+
+    def __init__(self, snapshot, max_bytes=None, max_records=None,
+                 lock=None):
+        """Instantiates a journal for the snapshot file"""
+        self.snapshot = snapshot
+        self.path = snapshot + '.log'
+        self.rotated = self.path + '.1'
+        self.max_bytes = max_bytes or int(
+            getenv('HBNB_JOURNAL_MAX_BYTES', 8 * 1024 * 1024))
+        self.max_records = max_records or int(
+            getenv('HBNB_JOURNAL_MAX_RECORDS', 100000))
+        self.records = 0
+        self.lock = lock
+        self.stats = {'runs': 0, 'last_duration': 0.0,
+                      'total_duration': 0.0, 'bytes_reclaimed': 0,
+                      'records_dropped': 0, 'last_error': None}
+        self.__lock = threading.Lock()
+        self.__compacting = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__thread = None
+        self.__closed = False
+
+    def append(self, upserts, deletes):
+        """Appends one record per changed object to the log
+
+        Args:
+            upserts (dict): serialized objects (to_dict()) by key
+            deletes (iterable): keys of the deleted objects
+        """
+        lines = []
+        for key, value in upserts.items():
+            lines.append(json.dumps([self.UPSERT, key, value],
+                                    separators=(',', ':')))
+        for key in deletes:
+            lines.append(json.dumps([self.TOMBSTONE, key],
+                                    separators=(',', ':')))
+        if not lines:
+            return
+        data = ('\n'.join(lines) + '\n').encode()
+        with self.__lock:
+            with open(self.path, 'ab+') as f:
+                size = f.seek(0, os.SEEK_END)
+                if size:
+                    f.seek(size - 1)
+                    if f.read(1) != b'\n':
+                        # end the record torn by a crash, that replay()
+                        # skips, instead of gluing this one to it
+                        data = b'\n' + data
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            self.records += len(lines)
+        if size >= self.max_bytes or self.records >= self.max_records:
+            self.request_compaction()
+
+    def replay(self, records, path=None):
+        """Applies the log on top of records (a dict of to_dict() by key)
+
+        A truncated last line, left by a crash in the middle of an
+        append, is ignored.
+
+        Returns:
+            the number of records read from the log
+        """
+        count = 0
+        try:
+            with open(path or self.path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record[0] == self.UPSERT:
+                        records[record[1]] = record[2]
+                    else:
+                        records.pop(record[1], None)
+                    count += 1
+        except FileNotFoundError:
+            pass
+        return count
+
+    def load(self):
+        """Returns the snapshot with the rotated and current logs applied
+        """
+        records = {}
+        try:
+            with open(self.snapshot, 'r') as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            pass
+        self.replay(records, self.rotated)
+        self.records = self.replay(records)
+        return records
+
+    def truncate(self):
+        """Removes the logs and their pending compaction"""
+        with self.__lock:
+            for path in (self.path, self.rotated):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.records = 0
+
+    def request_compaction(self):
+        """Wakes up the background compaction thread, unless closed"""
+        if self.__closed:
+            return
+        if self.__thread is None or not self.__thread.is_alive():
+            if self.__thread is None:
+                atexit.register(self.close)
+            self.__thread = threading.Thread(target=self.__run,
+                                             name='hbnb-compaction',
+                                             daemon=True)
+            self.__thread.start()
+        self.__wakeup.set()
+
+    def close(self):
+        """Stops the background compaction thread, letting a running
+        compaction finish, as the shutdown hook of the journal
+        """
+        self.__closed = True
+        self.__wakeup.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __run(self):
+        """Body of the background compaction thread"""
+        while True:
+            self.__wakeup.wait()
+            self.__wakeup.clear()
+            if self.__closed:
+                return
+            try:
+                self.compact()
+            except Exception:
+                pass  # kept in stats['last_error'], retried next time
+
+    def compact(self):
+        """Folds the log into a fresh snapshot
+
+        Writers are only held for the rename of the log; a crash at any
+        point leaves either the old snapshot and the rotated log, or the
+        new snapshot, which reload() both handles.
+
+        Returns:
+            the statistics of the compaction, or None if nothing was done
+        """
+        with self.__compacting:
+            with self.__hold(), self.__lock:
+                if not os.path.exists(self.rotated):
+                    if not os.path.exists(self.path):
+                        return None
+                    os.replace(self.path, self.rotated)
+                    self.records = 0
+                rotated = self.__identity(self.rotated)
+            start = time.perf_counter()
+            temp = '{}.{}.tmp'.format(self.snapshot, os.getpid())
+            try:
+                before = self.__size(self.snapshot)
+                before += self.__size(self.rotated)
+                records = {}
+                try:
+                    with open(self.snapshot, 'r') as f:
+                        records = json.load(f)
+                except FileNotFoundError:
+                    pass
+                read = len(records) + self.replay(records, self.rotated)
+                with open(temp, 'w') as f:
+                    json.dump(records, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self.__hold():
+                    if self.__identity(self.rotated) != rotated:
+                        # another process folded this log meanwhile
+                        return None
+                    os.replace(temp, self.snapshot)
+                    os.remove(self.rotated)
+            except Exception as error:
+                self.stats['last_error'] = repr(error)
+                raise
+            finally:
+                try:
+                    os.remove(temp)
+                except FileNotFoundError:
+                    pass
+            duration = time.perf_counter() - start
+            self.stats['runs'] += 1
+            self.stats['last_duration'] = duration
+            self.stats['total_duration'] += duration
+            self.stats['bytes_reclaimed'] += max(
+                before - self.__size(self.snapshot), 0)
+            self.stats['records_dropped'] += read - len(records)
+            self.stats['last_error'] = None
+            return dict(self.stats)
+
+    def __hold(self):
+        """Returns the context holding the lock shared with the other
+        processes exclusively, if any
+        """
+        if self.lock is None:
+            return nullcontext()
+        return self.lock.hold(exclusive=True)
+
+    @staticmethod
+    def __identity(path):
+        """Returns what tells the file at path from one made later at the
+        same path, None if it does not exist
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def __size(path):
+        """Returns the size of path, 0 if it does not exist"""
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
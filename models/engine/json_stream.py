@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""This module defines an incremental reader for large JSON objects"""
+import json
+
+
+def iter_items(f, chunk_size=1 << 16):
+    """Yields the (key, value) pairs of the JSON object stored in f
+
+    The file is read chunk by chunk and each value is decoded as soon as
+    it is complete, so the whole text never has to be held in memory.
+
+    Raises:
+        ValueError: if f does not hold a valid JSON object
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        """Drops the consumed text and reads one more chunk"""
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip():
+        """Moves pos to the next non blank character and returns it"""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\n\r':
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            fill()
+
+    def decode():
+        """Decodes the JSON value at pos, reading more text if needed"""
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            if end == len(buf) and not eof:
+                # a number may go on in the next chunk
+                fill()
+                continue
+            pos = end
+            return value
+
+    fill()
+    if skip() != '{':
+        raise ValueError('Expecting a JSON object')
+    pos += 1
+    if skip() == '}':
+        return
+    while True:
+        if skip() != '"':
+            raise ValueError('Expecting property name at {}'.format(pos))
+        key = decode()
+        if skip() != ':':
+            raise ValueError("Expecting ':' delimiter")
+        pos += 1
+        skip()
+        yield key, decode()
+        separator = skip()
+        pos += 1
+        if separator == '}':
+            return
+        if separator != ',':
+            raise ValueError("Expecting ',' delimiter")
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+"""This module defines the versioned schema migrations of the database
+
+Base.metadata.create_all() only creates the missing tables; it never
+changes a table that exists. The changes made to the models since a
+database was created are applied by the migrations below instead:
+each one is a function of a connection, run once, in version order,
+and recorded in the schema_migrations table.
+
+upgrade() does all of this, then stamps the schema_version table with
+the last migration and a fingerprint of the models; as long as both
+still match, the next startups skip the DDL and its introspection
+queries altogether.
+
+A new migration is added with the next version number::
+
+    @migration(2)
+    def add_place_rating(connection):
+        '''Adds places.rating'''
+        connection.exec_driver_sql('ALTER TABLE places ADD rating FLOAT')
+"""
+import hashlib
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(128), nullable=False),
+    Column('applied_at', DateTime, nullable=False))
+schema_version = Table(
+    'schema_version', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=False),
+    Column('version', Integer, nullable=False),
+    Column('fingerprint', String(64), nullable=False))
+
+MIGRATIONS = {}
+
+
+def migration(version):
+    """Registers the decorated function as the migration to version"""
+    def register(function):
+        """Adds function to MIGRATIONS"""
+        if version in MIGRATIONS:
+            raise ValueError('Duplicate migration {}'.format(version))
+        MIGRATIONS[version] = function
+        return function
+    return register
+
+
+def fingerprint(target):
+    """Returns a digest of the tables, columns and indexes of target, a
+    MetaData such as Base.metadata
+    """
+    digest = hashlib.sha256()
+    for table in target.sorted_tables:
+        digest.update(repr(table.name).encode())
+        for column in table.columns:
+            digest.update(repr((column.name, str(column.type),
+                                column.nullable)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(repr((index.name, [column.name for column in
+                                             index.columns])).encode())
+    return digest.hexdigest()
+
+
+def latest():
+    """Returns the version of the last migration"""
+    return max(MIGRATIONS, default=0)
+
+
+def is_current(engine, target):
+    """Tells, in a single query, if the database of engine was stamped
+    by upgrade() with the last migration and the fingerprint of target
+    """
+    try:
+        with engine.connect() as connection:
+            row = connection.execute(select(
+                schema_version.c.version, schema_version.c.fingerprint
+            ).where(schema_version.c.id == 1)).first()
+    except DBAPIError:
+        return False
+    return row is not None and \
+        tuple(row) == (latest(), fingerprint(target))
+
+
+def upgrade(engine, target):
+    """Creates the missing tables of target, applies the pending
+    migrations and stamps the schema version, unless it is current
+
+    Returns:
+        True if the schema had to be upgraded
+    """
+    if is_current(engine, target):
+        return False
+    target.create_all(engine)
+    migrate(engine)
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(schema_version.delete())
+        connection.execute(schema_version.insert().values(
+            id=1, version=latest(), fingerprint=fingerprint(target)))
+    return True
+
+
+def applied(connection):
+    """Returns the versions already applied to the database"""
+    rows = connection.execute(select(schema_migrations.c.version))
+    return {row.version for row in rows}
+
+
+def migrate(engine):
+    """Applies the migrations missing from the database of engine
+
+    Each migration runs in its own transaction along with its record in
+    schema_migrations, so a failed one is retried by the next run.
+
+    Returns:
+        the list of the versions applied
+    """
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        done = applied(connection)
+    ran = []
+    for version in sorted(MIGRATIONS):
+        if version in done:
+            continue
+        function = MIGRATIONS[version]
+        with engine.begin() as connection:
+            function(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=function.__name__,
+                applied_at=datetime.utcnow()))
+        ran.append(version)
+    return ran
+
+
+@migration(1)
+def add_lookup_indexes(connection):
+    """Creates the indexes of the lookup columns (states.name,
+    cities.state_id, places.city_id and price_by_night, reviews.place_id,
+    users.email) on tables created before they were declared
+    """
+    from models.base_model import Base
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
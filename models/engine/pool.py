@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""This module defines the connection pool of the database engines"""
+import threading
+import time
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+POOL_SETTINGS = (
+    ('HBNB_MYSQL_POOL_SIZE', 'pool_size', int),
+    ('HBNB_MYSQL_MAX_OVERFLOW', 'max_overflow', int),
+    ('HBNB_MYSQL_POOL_RECYCLE', 'pool_recycle', int),
+    ('HBNB_MYSQL_POOL_TIMEOUT', 'pool_timeout', float),
+)
+
+
+def pool_options(environ):
+    """Returns the create_engine() arguments of the pool settings found
+    in environ (a mapping such as os.environ)
+    """
+    options = {'poolclass': MeteredPool}
+    for name, option, kind in POOL_SETTINGS:
+        value = environ.get(name)
+        if value:
+            options[option] = kind(value)
+    return options
+
+
+class MeteredPool(QueuePool):
+    """A QueuePool counting its checkouts and the time they waited for
+    a free connection
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Instantiates a pool with its counters at zero"""
+        super().__init__(*args, **kwargs)
+        self.__lock = threading.Lock()
+        self.__checkouts = 0
+        self.__timeouts = 0
+        self.__wait = 0.0
+        self.__max_wait = 0.0
+
+    def _do_get(self):
+        """Checks a connection out, timing the wait"""
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            with self.__lock:
+                self.__timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self.__lock:
+                self.__checkouts += 1
+                self.__wait += wait
+                self.__max_wait = max(self.__max_wait, wait)
+
+    def statistics(self):
+        """Returns the pool occupancy and checkout counters
+
+        Returns:
+            dict: size, checked_in, checked_out and overflow (the current
+            connections), checkouts and timeouts (since the pool was
+            created), wait_time and max_wait (seconds spent waiting for a
+            connection, in total and at most)
+        """
+        with self.__lock:
+            return {
+                'size': self.size(),
+                'checked_in': self.checkedin(),
+                'checked_out': self.checkedout(),
+                'overflow': self.overflow(),
+                'checkouts': self.__checkouts,
+                'timeouts': self.__timeouts,
+                'wait_time': self.__wait,
+                'max_wait': self.__max_wait,
+            }
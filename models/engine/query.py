@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+"""This module defines the predicates of the storage query() API
+
+A predicate spec is a list of ``(attribute, operator, value)`` tuples,
+all of which an object must match. query() builds it from keyword
+filters named ``<attribute>__<operator>``, a bare ``<attribute>``
+standing for equality::
+
+    storage.query(Place, city_id=city.id, price_by_night__le=100,
+                  order_by='-price_by_night', limit=10)
+
+It also holds what the storage engines share to answer a query: the
+registry of the model classes by name, and the ordering and limit of
+the objects found.
+"""
+import operator
+
+OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'le': operator.le,
+    'gt': operator.gt,
+    'ge': operator.ge,
+    'in': lambda value, values: value in values,
+}
+
+
+def parse(filters):
+    """Returns the predicate spec of the keyword filters
+
+    Raises:
+        ValueError: if a filter names an unknown operator
+    """
+    spec = []
+    for name, value in filters.items():
+        attr, sep, op = name.rpartition('__')
+        if not sep or not attr:
+            attr, op = name, 'eq'
+        spec.append((attr, op, value))
+    return check(spec)
+
+
+def check(spec):
+    """Returns spec as a list of (attribute, operator, value) tuples
+
+    Raises:
+        ValueError: if a predicate is malformed or names an unknown
+            operator
+    """
+    predicates = []
+    for predicate in spec:
+        try:
+            attr, op, value = predicate
+        except (TypeError, ValueError):
+            raise ValueError('Invalid predicate: {!r}'.format(predicate))
+        if op not in OPERATORS:
+            raise ValueError('Unknown operator: {!r}'.format(op))
+        if op == 'in':
+            value = list(value)
+        predicates.append((attr, op, value))
+    return predicates
+
+
+def matches(obj, spec):
+    """Tells if obj matches every predicate of spec
+
+    A missing attribute is None, and a comparison that cannot be made
+    (such as None < 3) does not match.
+    """
+    for attr, op, value in spec:
+        try:
+            if not OPERATORS[op](getattr(obj, attr, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def ordering(order_by):
+    """Returns the (attribute, descending) pairs of order_by, an
+    attribute name or a list of them, each prefixed with '-' to sort in
+    descending order
+    """
+    if not order_by:
+        return []
+    if type(order_by) is str:
+        order_by = [order_by]
+    return [(name[1:], True) if name.startswith('-') else (name, False)
+            for name in order_by]
+
+
+def sort(objects, order_by):
+    """Returns the objects sorted by order_by, None values first"""
+    objects = list(objects)
+    for attr, descending in reversed(ordering(order_by)):
+        objects.sort(key=lambda obj: (getattr(obj, attr, None) is not None,
+                                      getattr(obj, attr, None)),
+                     reverse=descending)
+    return objects
+
+
+def name(cls):
+    """Returns the class name of cls, a class or a class name"""
+    return cls if type(cls) is str else cls.__name__
+
+
+def classes():
+    """Returns the model classes by name"""
+    from models.base_model import BaseModel
+    from models.user import User
+    from models.place import Place
+    from models.state import State
+    from models.city import City
+    from models.amenity import Amenity
+    from models.review import Review
+
+    return {
+             'BaseModel': BaseModel, 'User': User, 'Place': Place,
+             'State': State, 'City': City, 'Amenity': Amenity,
+             'Review': Review
+           }
+
+
+def select(found, order_by=None, limit=None):
+    """Returns the (key, object) pairs of the list found sorted by
+    order_by and at most limit of them, by key
+    """
+    if order_by:
+        keys = {id(obj): key for key, obj in found}
+        found = [(keys[id(obj)], obj) for obj in
+                 sort((obj for key, obj in found), order_by)]
+    if limit is not None:
+        found = found[:limit]
+    return dict(found)
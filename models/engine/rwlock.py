@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""This module defines a reader-writer lock for the storage engines"""
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """A lock shared by many readers or held by a single writer
+
+    Waiting writers go before new readers so that a steady flow of reads
+    cannot starve them. Both sides are reentrant, and the writer may also
+    take the read side.
+    """
+
+    def __init__(self):
+        """Instantiates an unlocked lock"""
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__writes = 0
+        self.__waiting = 0
+        self.__local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """Holds the lock as a reader for the block"""
+        me = threading.get_ident()
+        held = getattr(self.__local, 'reads', 0)
+        with self.__cond:
+            if self.__writer != me and not held:
+                while self.__writer is not None or self.__waiting:
+                    self.__cond.wait()
+            self.__readers += 1
+        self.__local.reads = held + 1
+        try:
+            yield
+        finally:
+            self.__local.reads = held
+            with self.__cond:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Holds the lock as the only writer for the block"""
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer != me:
+                if getattr(self.__local, 'reads', 0):
+                    raise RuntimeError('cannot upgrade a read lock')
+                self.__waiting += 1
+                while self.__writer is not None or self.__readers:
+                    self.__cond.wait()
+                self.__waiting -= 1
+                self.__writer = me
+            self.__writes += 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__writes -= 1
+                if not self.__writes:
+                    self.__writer = None
+                    self.__cond.notify_all()
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""This module defines the sharded file layout used by FileStorage"""
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from os import getenv
+from models.engine.atomic_file import replacing
+
+
+def read_shard(path):
+    """Returns the records of one shard file"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class ShardStore:
+    """Stores FileStorage objects in one JSON file per model class
+
+    The classes listed in shards are further split by a hash of their
+    id, so that saving one Review only rewrites the shard holding it.
+    Shards are named ``<Class>.json`` or ``<Class>.<n>.json``.
+
+    Attributes:
+        directory (str): directory holding the shard files
+        shards (dict): number of hash shards by class name, read from
+            HBNB_FILE_SHARDS ("Place=4,Review=16") by default
+        workers (int): processes used by load(), from HBNB_FILE_WORKERS
+    """
+
+    def __init__(self, directory, shards=None, workers=None):
+        """Instantiates a store writing to directory"""
+        self.directory = directory
+        if shards is None:
+            shards = {}
+            for item in getenv('HBNB_FILE_SHARDS', '').split(','):
+                if '=' in item:
+                    name, count = item.split('=')
+                    shards[name.strip()] = int(count)
+        self.shards = shards
+        if workers is None:
+            workers = int(getenv('HBNB_FILE_WORKERS', os.cpu_count() or 1))
+        self.workers = workers
+        self.__members = {}
+
+    def shard(self, key):
+        """Returns the name of the shard file holding key"""
+        name, _, obj_id = key.partition('.')
+        count = self.shards.get(name, 1)
+        if count > 1:
+            index = zlib.crc32(obj_id.encode()) % count
+            return '{}.{}.json'.format(name, index)
+        return name + '.json'
+
+    def exists(self):
+        """Tells if the shard directory has been written"""
+        return os.path.isdir(self.directory)
+
+    def load(self):
+        """Returns the (key, to_dict()) records of every shard
+
+        The shards are parsed in parallel by a process pool when there is
+        more than one of them and more than one worker.
+        """
+        names = sorted(name for name in os.listdir(self.directory)
+                       if name.endswith('.json'))
+        paths = [os.path.join(self.directory, name) for name in names]
+        if self.workers > 1 and len(paths) > 1:
+            workers = min(self.workers, len(paths))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                shards = list(pool.map(read_shard, paths))
+        else:
+            shards = [read_shard(path) for path in paths]
+        records = []
+        self.__members = {}
+        for name, shard in zip(names, shards):
+            self.__members[name] = set(shard)
+            records.extend(shard.items())
+        return records
+
+    def save(self, changed, deleted, record):
+        """Rewrites the shards holding the changed or deleted keys
+
+        Args:
+            changed (iterable): keys of the new or updated objects
+            deleted (iterable): keys of the deleted objects
+            record (function): returns the to_dict() of a stored key
+
+        Returns:
+            the number of shard files written
+        """
+        shards = self.plan(changed, deleted)
+        return self.write({name: {key: record(key) for key in keys}
+                           for name, keys in shards.items()})
+
+    def plan(self, changed, deleted):
+        """Records the changed and deleted keys in their shards
+
+        Returns:
+            the keys now held by each shard to rewrite, by shard name
+        """
+        dirty = set()
+        for key in changed:
+            name = self.shard(key)
+            self.__members.setdefault(name, set()).add(key)
+            dirty.add(name)
+        for key in deleted:
+            name = self.shard(key)
+            self.__members.get(name, set()).discard(key)
+            dirty.add(name)
+        return {name: list(self.__members.get(name, ())) for name in dirty}
+
+    def write(self, shards):
+        """Writes the records of each shard, removing the empty ones
+
+        Args:
+            shards (dict): to_dict() by key, by shard name
+
+        Returns:
+            the number of shard files written
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for name, records in shards.items():
+            path = os.path.join(self.directory, name)
+            if not records:
+                self.__members.pop(name, None)
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            with replacing(path) as f:
+                json.dump(records, f)
+        return len(shards)
@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+"""This module defines the indexed, read-only snapshot file format
+
+A snapshot starts with MAGIC and a header giving the offset and length
+of its directory, followed by the records, each the compact JSON text
+of a to_dict(), then by the index tables, and ends with the marshal'ed
+directory::
+
+    MAGIC | directory offset (8) | directory length (8) | records... |
+    tables... | directory
+
+The directory is::
+
+    ({class_name: (offset, count, key width), ...},
+     {class_name: {attribute: (offset, count, value width, key width)}})
+
+Each class has a table of its keys in sorted order, each entry the key
+padded with NUL bytes to the key width, then the offset (8) and length
+(4) of its record. Each attribute given to dump() has a table of its
+(value, key) pairs in sorted order, each the JSON text of the value
+and the key, both padded, so that the keys of a value are found by a
+binary search. The tables are searched where they are mapped: opening
+a snapshot only reads the directory, and the processes mapping the
+same file share the index as they share the records. A snapshot is
+never changed once written: dump() writes a new file that replaces the
+old one, so readers that mapped the old one keep it.
+"""
+import json
+import marshal
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from models.engine.atomic_file import replacing
+
+MAGIC = b'HBNBSNP2'
+HEADER = struct.Struct('<QQ')
+POSITION = struct.Struct('<QI')
+
+
+def dump(records, path, relations=None):
+    """Writes records (a dict of to_dict() by key) to the snapshot path
+
+    Args:
+        records (dict): the to_dict() of the objects by key
+        path (str): the snapshot file, replaced atomically
+        relations (dict): the attributes to index by class name, such
+            as {'City': ('state_id',)}; a list attribute is indexed by
+            each of its values
+    """
+    relations = relations or {}
+    classes = {}
+    refs = {}
+    with replacing(path, 'wb') as f:
+        f.write(MAGIC + HEADER.pack(0, 0))
+        offset = f.tell()
+        for key in sorted(records):
+            record = records[key]
+            name = record['__class__']
+            data = json.dumps(record, separators=(',', ':')).encode()
+            f.write(data)
+            classes.setdefault(name, []).append(
+                (key.encode(), offset, len(data)))
+            offset += len(data)
+            for attr in relations.get(name, ()):
+                values = record.get(attr)
+                if type(values) is not list:
+                    values = [values]
+                pairs = refs.setdefault(name, {}).setdefault(attr, [])
+                for value in values:
+                    pairs.append((encode(value), key.encode()))
+        directory = ({}, {})
+        for name, entries in classes.items():
+            width = max(len(key) for key, _, _ in entries)
+            directory[0][name] = (offset, len(entries), width)
+            for key, position, length in entries:
+                f.write(key.ljust(width, b'\0'))
+                f.write(POSITION.pack(position, length))
+            offset += len(entries) * (width + POSITION.size)
+        for name, attrs in refs.items():
+            for attr, pairs in attrs.items():
+                pairs.sort()
+                width = max((len(value) for value, _ in pairs), default=0)
+                keys = max((len(key) for _, key in pairs), default=0)
+                directory[1].setdefault(name, {})[attr] = (
+                    offset, len(pairs), width, keys)
+                for value, key in pairs:
+                    f.write(value.ljust(width, b'\0'))
+                    f.write(key.ljust(keys, b'\0'))
+                offset += len(pairs) * (width + keys)
+        data = marshal.dumps(directory, 4)
+        f.write(data)
+        f.seek(len(MAGIC))
+        f.write(HEADER.pack(offset, len(data)))
+
+
+def encode(value):
+    """Returns the bytes a value is indexed by
+
+    Raises:
+        TypeError: if value cannot be stored in JSON
+    """
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+class Table:
+    """The sorted fixed-width entries of an index table, read as the
+    sequence of their leading field, which bisect searches
+
+    Attributes:
+        size (int): the width of an entry
+    """
+
+    def __init__(self, data, offset, count, width, size):
+        """Instantiates the table of count entries of size bytes at
+        offset of data, led by a field width bytes wide
+        """
+        self.__data = data
+        self.__offset = offset
+        self.__count = count
+        self.__width = width
+        self.size = size
+
+    def __len__(self):
+        """Returns the number of entries"""
+        return self.__count
+
+    def __getitem__(self, i):
+        """Returns the leading field of the entry i, padded"""
+        if not 0 <= i < self.__count:
+            raise IndexError(i)
+        start = self.__offset + i * self.size
+        return self.__data[start:start + self.__width]
+
+    def rest(self, i):
+        """Returns the fields of the entry i after the leading one"""
+        start = self.__offset + i * self.size
+        return self.__data[start + self.__width:start + self.size]
+
+    def find(self, field):
+        """Returns the index of the first entry whose leading field is
+        field, or of the entry it would go before
+        """
+        return bisect_left(self, field.ljust(self.__width, b'\0'))
+
+    def lead(self, i):
+        """Returns the leading field of the entry i, unpadded"""
+        return self[i].rstrip(b'\0')
+
+
+class Keys:
+    """The keys of a class in a snapshot, in key order, decoded from its
+    key table as they are read
+    """
+
+    def __init__(self, table):
+        """Instantiates the keys of table, or none if table is None"""
+        self.__table = table
+
+    def __len__(self):
+        """Returns the number of keys"""
+        return len(self.__table) if self.__table is not None else 0
+
+    def __iter__(self):
+        """Iterates over the keys"""
+        table = self.__table
+        for i in range(len(self)):
+            yield table.lead(i).decode()
+
+
+class Snapshot:
+    """A snapshot file mapped in memory
+
+    Only the directory is read when the snapshot is opened; the keys
+    and the reverse indexes are searched in the mapping, and the
+    records decoded one at a time from it, so the processes reading
+    the same file share all of it in the page cache. Once closed, the
+    snapshot holds no record.
+
+    Attributes:
+        path (str): the snapshot file
+        signature (tuple): the inode and modification time of the file
+            mapped
+    """
+
+    def __init__(self, path):
+        """Maps the snapshot path
+
+        Raises:
+            ValueError: if path is not a snapshot
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.signature = (stat.st_ino, stat.st_mtime_ns)
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(MAGIC)
+        if self.__map[:start] != MAGIC:
+            self.__map.close()
+            raise ValueError('Not a HBNB snapshot')
+        offset, length = HEADER.unpack_from(self.__map, start)
+        try:
+            classes, refs = marshal.loads(self.__map[offset:offset + length])
+        except (EOFError, TypeError, ValueError) as error:
+            self.__map.close()
+            raise ValueError('Corrupted HBNB snapshot') from error
+        self.__classes = {}
+        for name, (offset, count, width) in classes.items():
+            self.__classes[name] = Table(self.__map, offset, count, width,
+                                         width + POSITION.size)
+        self.__refs = {}
+        for name, attrs in refs.items():
+            for attr, (offset, count, width, keys) in attrs.items():
+                self.__refs.setdefault(name, {})[attr] = Table(
+                    self.__map, offset, count, width, width + keys)
+
+    def classes(self):
+        """Returns the names of the classes stored"""
+        return list(self.__classes)
+
+    def keys(self, name):
+        """Returns the keys of the records of the class name, in key
+        order
+        """
+        return Keys(self.__classes.get(name))
+
+    def indexed(self, name, attr):
+        """Tells if the attribute attr of the class name is indexed"""
+        return attr in self.__refs.get(name, {})
+
+    def refs(self, name, attr, value):
+        """Returns the keys of the objects of the class name whose
+        indexed attribute attr is (or contains) value
+        """
+        try:
+            table = self.__refs[name][attr]
+            value = encode(value)
+        except (KeyError, TypeError, ValueError):
+            return []
+        keys = []
+        if self.__map.closed:
+            return keys
+        i = table.find(value)
+        while i < len(table) and table.lead(i) == value:
+            keys.append(table.rest(i).rstrip(b'\0').decode())
+            i += 1
+        return keys
+
+    def record(self, name, key):
+        """Returns the to_dict() at key of the class name, or None"""
+        table = self.__classes.get(name)
+        if table is None or self.__map.closed:
+            return None
+        key = key.encode()
+        i = table.find(key)
+        if i == len(table) or table.lead(i) != key:
+            return None
+        offset, length = POSITION.unpack(table.rest(i))
+        return json.loads(self.__map[offset:offset + length])
+
+    def close(self):
+        """Unmaps the file"""
+        self.__map.close()
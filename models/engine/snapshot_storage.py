@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""This is the read-only snapshot storage class for AirBnB cloning"""
+import io
+import os
+from collections.abc import Mapping
+from os import getenv
+from models.engine import query
+from models.engine.snapshot_format import Snapshot
+
+
+class Objects(Mapping):
+    """The objects of a snapshot by key, each built from its record the
+    first time it is read
+    """
+
+    def __init__(self, build, keys):
+        """Instantiates the objects at keys, a list of (class name, key)
+        pairs, built by build(name, key)
+        """
+        self.__build = build
+        self.__names = dict((key, name) for name, key in keys)
+        self.__built = {}
+
+    def __getitem__(self, key):
+        """Returns the object at key"""
+        obj = self.__built.get(key)
+        if obj is None:
+            obj = self.__build(self.__names[key], key)
+            if obj is None:
+                raise KeyError(key)
+            self.__built[key] = obj
+        return obj
+
+    def __iter__(self):
+        """Iterates over the keys"""
+        return iter(self.__names)
+
+    def __len__(self):
+        """Returns the number of objects"""
+        return len(self.__names)
+
+
+class SnapshotStorage:
+    """Serves the models from a snapshot written by FileStorage.snapshot()
+
+    The snapshot is mapped in memory rather than loaded: opening it only
+    reads its index, and each object is built from its record when it is
+    read, so the web workers serving one snapshot share its pages
+    instead of holding each a copy of every object.
+
+    all() returns a read-only mapping that builds the objects as they
+    are looked up. close(), at the end of a request, maps the snapshot
+    again if the exporter replaced it since, unmapping the old one: the
+    mappings returned before then only hold the objects they built.
+    The storage cannot be written: new(), save() and delete() raise
+    io.UnsupportedOperation.
+
+    Attributes:
+        path (str): the snapshot file, read from HBNB_SNAPSHOT_PATH
+            (file.snap by default)
+
+    """
+
+    def __init__(self, path=None):
+        """Instantiates a storage of the snapshot path, mapped on
+        reload()
+        """
+        self.path = path or getenv('HBNB_SNAPSHOT_PATH', 'file.snap')
+        self.__snapshot = None
+
+    def reload(self):
+        """Maps the snapshot file, unmapping the one mapped before; a
+        missing one holds no object
+        """
+        previous = self.__snapshot
+        try:
+            self.__snapshot = Snapshot(self.path)
+        except FileNotFoundError:
+            self.__snapshot = None
+        if previous is not None:
+            previous.close()
+
+    def close(self):
+        """Maps the snapshot again if the file was replaced"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.reload()
+            return
+        snapshot = self.__snapshot
+        if snapshot is None or \
+                snapshot.signature != (stat.st_ino, stat.st_mtime_ns):
+            self.reload()
+
+    def all(self, cls=None, load=None):
+        """Returns the objects of cls (or class name), or of every class,
+        by key
+        """
+        snapshot = self.__snapshot
+        if snapshot is None:
+            return Objects(None, [])
+        names = [query.name(cls)] if cls else snapshot.classes()
+        keys = [(name, key) for name in names for key in snapshot.keys(name)]
+        return Objects(self.__builder(snapshot), keys)
+
+    def get(self, cls, id):
+        """Returns the object of cls (or class name) with id, or None"""
+        snapshot = self.__snapshot
+        if snapshot is None:
+            return None
+        name = query.name(cls)
+        return self.__builder(snapshot)(name, '{}.{}'.format(name, id))
+
+    def count(self, cls=None):
+        """Returns the number of objects of cls (or class name), or of
+        every class, from the index
+        """
+        snapshot = self.__snapshot
+        if snapshot is None:
+            return 0
+        names = [query.name(cls)] if cls else snapshot.classes()
+        return sum(len(snapshot.keys(name)) for name in names)
+
+    def related(self, cls, attr, value):
+        """Returns the objects of cls whose attr is (or, for a list
+        attribute such as amenity_ids, contains) value, from the index
+        of the snapshot when it has one
+        """
+        name = query.name(cls)
+        snapshot = self.__snapshot
+        if snapshot is None or not snapshot.indexed(name, attr):
+            return dict(self.filter(name, [(attr, 'eq', value)]))
+        keys = [(name, key) for key in snapshot.refs(name, attr, value)]
+        return dict(Objects(self.__builder(snapshot), keys))
+
+    def query(self, cls, order_by=None, limit=None, load=None, **filters):
+        """Returns the objects of cls matching the keyword filters (see
+        models.engine.query), sorted by order_by and at most limit of
+        them, by key
+        """
+        return self.filter(cls, query.parse(filters), order_by, limit)
+
+    def filter(self, cls, spec, order_by=None, limit=None, load=None):
+        """Returns the objects of cls matching the predicate spec, a list
+        of (attribute, operator, value) tuples, sorted by order_by and at
+        most limit of them, by key
+
+        An equality on the id or on an indexed attribute only builds the
+        objects its index finds.
+        """
+        spec = query.check(spec)
+        name = query.name(cls)
+        snapshot = self.__snapshot
+        if snapshot is None:
+            return {}
+        keys = None
+        for attr, op, value in spec:
+            if op != 'eq':
+                continue
+            if attr == 'id':
+                keys = ['{}.{}'.format(name, value)]
+            elif snapshot.indexed(name, attr):
+                keys = snapshot.refs(name, attr, value)
+            else:
+                continue
+            break
+        if keys is None:
+            keys = snapshot.keys(name)
+        objects = Objects(self.__builder(snapshot),
+                          [(name, key) for key in keys])
+        found = []
+        for key in objects:
+            try:
+                obj = objects[key]
+            except KeyError:
+                continue
+            if query.matches(obj, spec):
+                found.append((key, obj))
+        return query.select(found, order_by, limit)
+
+    def new(self, obj):
+        """The snapshot is read-only"""
+        raise io.UnsupportedOperation('SnapshotStorage is read-only')
+
+    def save(self):
+        """The snapshot is read-only"""
+        raise io.UnsupportedOperation('SnapshotStorage is read-only')
+
+    def delete(self, obj=None):
+        """The snapshot is read-only"""
+        raise io.UnsupportedOperation('SnapshotStorage is read-only')
+
+    def __builder(self, snapshot):
+        """Returns the function building the object of a class name and
+        key from snapshot, or None
+        """
+        classes = query.classes()
+
+        def build(name, key):
+            """Returns the object of the class name at key, or None"""
+            record = snapshot.record(name, key)
+            if record is None:
+                return None
+            return classes[name](**record)
+        return build
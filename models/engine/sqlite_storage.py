@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""This is the embedded SQLite storage class for AirBnB cloning"""
+from models.engine.db_storage import DBStorage
+from models.engine.pool import pool_options
+from os import environ, getenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.pool import StaticPool
+
+
+class SQLiteStorage(DBStorage):
+    """Stores the models in a local SQLite database file.
+
+    It is a DBStorage whose engine is an SQLite file instead of a MySQL
+    server, so it keeps the same tables, relationships and contract.
+    Every connection is set up with the pragmas below: the write-ahead
+    log lets readers run while a commit is written, and each commit only
+    syncs the log instead of the whole database. The pool of a database
+    file is sized by the same HBNB_MYSQL_POOL_* variables as DBStorage.
+
+    Attributes:
+        path (str): the database file, read from HBNB_SQLITE_DB
+            (hbnb.db by default, ':memory:' for a private database)
+        pragmas (dict): the PRAGMA statements run on every connection
+
+    """
+
+    pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'foreign_keys': 'ON',
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+        'cache_size': -16384,
+        'mmap_size': 1 << 28,
+    }
+
+    def __init__(self, path=None, reload=True):
+        """Open (and create if needed, unless reload is False) the
+        database at path
+        """
+
+        if path is None:
+            path = getenv('HBNB_SQLITE_DB', 'hbnb.db')
+        self.path = path
+        super().__init__(reload)
+        if path == ':memory:':
+            self.workers = 1
+
+    def connect(self):
+        """Create the SQLAlchemy engine of the SQLite database.
+
+        An in-memory database lives in a single connection shared by
+        every thread, since each new connection would open an empty one;
+        all() then reads its tables one after another.
+        """
+
+        if self.path == ':memory:':
+            engine = create_engine(
+                'sqlite://', poolclass=StaticPool,
+                connect_args={'check_same_thread': False})
+        else:
+            engine = create_engine('sqlite:///' + self.path,
+                                   **pool_options(environ))
+
+        @event.listens_for(engine, 'connect')
+        def set_pragmas(connection, record):
+            """Run the pragmas on a new DBAPI connection"""
+            cursor = connection.cursor()
+            for name, value in self.pragmas.items():
+                cursor.execute('PRAGMA {} = {}'.format(name, value))
+            cursor.close()
+
+        return engine
+
+    def upsert(self, table):
+        """Get the INSERT ... ON CONFLICT DO UPDATE statement of table.
+        """
+
+        statement = sqlite.insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[column for column in table.primary_key],
+            set_={column.name: statement.excluded[column.name]
+                  for column in table.columns if not column.primary_key})
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""This module defines the write-behind flusher used by FileStorage"""
+import threading
+import time
+from os import getenv
+
+
+class WriteBehind:
+    """Defers the saves of a storage to a background flusher thread
+
+    save() only hands its changes over and returns; the flusher
+    persists everything saved since its last run at most interval
+    seconds after the first deferred save. The changes stay in the
+    storage until then, so repeated saves of one object are written once.
+
+    The changes a crash can lose are bounded: at most interval seconds
+    of them, and never max_changes or more objects, since a save that
+    finds that many pending persists them itself instead of deferring.
+
+    Attributes:
+        interval (float): the most seconds a save is deferred, from
+            HBNB_FLUSH_INTERVAL
+        max_changes (int): the pending changes that make a save persist
+            at once, from HBNB_FLUSH_MAX_CHANGES
+        stats (dict): flusher statistics
+    """
+
+    def __init__(self, persist, interval=None, max_changes=None):
+        """Instantiates a flusher calling persist to write the changes"""
+        self.interval = interval if interval is not None else float(
+            getenv('HBNB_FLUSH_INTERVAL', 1.0))
+        self.max_changes = max_changes or int(
+            getenv('HBNB_FLUSH_MAX_CHANGES', 1000))
+        self.stats = {'deferred': 0, 'forced': 0, 'flushes': 0,
+                      'last_duration': 0.0, 'last_error': None}
+        self.__persist = persist
+        self.__condition = threading.Condition()
+        self.__due = None
+        self.__closed = False
+        self.__thread = None
+
+    def defer(self, pending):
+        """Schedules a flush of the pending changes
+
+        Returns:
+            False when pending reached max_changes: the caller must then
+            persist the changes itself
+        """
+        with self.__condition:
+            if pending >= self.max_changes or self.__closed:
+                self.stats['forced'] += 1
+                return False
+            self.stats['deferred'] += 1
+            if self.__due is None:
+                self.__due = time.monotonic() + self.interval
+                self.__condition.notify()
+            if self.__thread is None or not self.__thread.is_alive():
+                self.__thread = threading.Thread(target=self.__run,
+                                                 name='hbnb-flusher',
+                                                 daemon=True)
+                self.__thread.start()
+        return True
+
+    def flush(self):
+        """Persists the deferred changes now, in the calling thread
+
+        Once it returns, every save made before the call is on disk.
+        """
+        with self.__condition:
+            self.__due = None
+        self.__flush()
+
+    def close(self):
+        """Stops the flusher and persists the deferred changes, as the
+        shutdown hook of the storage
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+            thread = self.__thread
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def __flush(self):
+        """Calls persist, keeping its duration or error in stats"""
+        start = time.perf_counter()
+        try:
+            self.__persist()
+        except Exception as error:
+            self.stats['last_error'] = repr(error)
+            raise
+        self.stats['flushes'] += 1
+        self.stats['last_duration'] = time.perf_counter() - start
+        self.stats['last_error'] = None
+
+    def __run(self):
+        """Body of the flusher thread: flushes whenever a deferred save
+        is due, until close()
+        """
+        while True:
+            with self.__condition:
+                while self.__due is None and not self.__closed:
+                    self.__condition.wait()
+                if self.__closed:
+                    return
+                delay = self.__due - time.monotonic()
+                if delay > 0:
+                    self.__condition.wait(delay)
+                    continue
+                self.__due = None
+            try:
+                self.__flush()
+            except Exception:
+                # the storage kept the changes: retry after interval
+                with self.__condition:
+                    if self.__due is None:
+                        self.__due = time.monotonic() + self.interval
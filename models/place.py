@@ -32,15 +32,16 @@ class Place(BaseModel, Base):
 
     __tablename__ = "places"
 
-    if getenv('HBNB_TYPE_STORAGE') == "db":
-        city_id = Column(String(60), ForeignKey("cities.id"), nullable=False)
+    if getenv('HBNB_TYPE_STORAGE') in ("db", "sqlite"):
+        city_id = Column(String(60), ForeignKey("cities.id"), nullable=False,
+                         index=True)
         user_id = Column(String(60), ForeignKey("users.id"), nullable=False)
         name = Column(String(128), nullable=False)
         description = Column(String(128))
         number_rooms = Column(Integer, default=0)
         number_bathrooms = Column(Integer, default=0)
         max_guest = Column(Integer, default=0)
-        price_by_night = Column(Integer, default=0)
+        price_by_night = Column(Integer, default=0, index=True)
         latitude = Column(Float)
         longitude = Column(Float)
         reviews = relationship("Review", backref="place", cascade="delete")
@@ -66,13 +67,8 @@ class Place(BaseModel, Base):
             """Get a list of all linked Reviews.
             """
 
-            review_list = []
-
-            for review in models.storage.all(Review).values():
-                if review.place_id == self.id:
-                    review_list.append(review)
-
-            return review_list
+            return list(models.storage.related(Review, 'place_id',
+                                               self.id).values())
 
         @property
         def amenities(self):
@@ -81,8 +77,9 @@ class Place(BaseModel, Base):
 
             amenity_list = []
 
-            for amenity in models.storage.all(Amenity).values():
-                if amenity.id in self.amenity_ids:
+            for amenity_id in self.amenity_ids:
+                amenity = models.storage.get(Amenity, amenity_id)
+                if amenity is not None:
                     amenity_list.append(amenity)
 
             return amenity_list
@@ -92,5 +89,5 @@ class Place(BaseModel, Base):
             """Adding an Amenity.id to the amenity_ids
             """
 
-            if type(value) == Amenity:
-                self.amenity_ids.append(value.id)
+            if type(value) == Amenity and value.id not in self.amenity_ids:
+                self.amenity_ids = self.amenity_ids + [value.id]
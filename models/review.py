@@ -17,8 +17,9 @@ class Review(BaseModel, Base):
 
     __tablename__ = "reviews"
 
-    if getenv('HBNB_TYPE_STORAGE') == 'db':
-        place_id = Column(String(60), ForeignKey("places.id"), nullable=False)
+    if getenv('HBNB_TYPE_STORAGE') in ('db', 'sqlite'):
+        place_id = Column(String(60), ForeignKey("places.id"),
+                          nullable=False, index=True)
         user_id = Column(String(60), ForeignKey("users.id"), nullable=False)
         text = Column(String(1024), nullable=False)
     else:
@@ -9,10 +9,10 @@ from sqlalchemy.orm import relationship
 class State(BaseModel, Base):
     """ State class """
     __tablename__ = "states"
-    name = Column(String(128), nullable=False)
+    name = Column(String(128), nullable=False, index=True)
 
     storageType = environ.get("HBNB_TYPE_STORAGE", "")
-    if storageType == 'db':
+    if storageType in ('db', 'sqlite'):
         cities = relationship("City", backref="state",
                               cascade="all, delete-orphan")
     else:
@@ -21,8 +21,4 @@ class State(BaseModel, Base):
             '''Get all cities'''
             from models.city import City
             from models import storage
-            cities_list = []
-            for city in storage.all(City).values():
-                if city.state_id == self.id:
-                    cities_list.append(city)
-            return cities_list
+            return list(storage.related(City, 'state_id', self.id).values())
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """This module defines a class User"""
 from models.base_model import BaseModel, Base
+from os import getenv
 from sqlalchemy import Column, String
 from sqlalchemy.orm import relationship
 
@@ -20,9 +21,11 @@ class User(BaseModel, Base):
     """
 
     __tablename__ = "users"
-    email = Column(String(128), nullable=False)
+    email = Column(String(128), nullable=False, index=True)
     password = Column(String(128), nullable=False)
     first_name = Column(String(128))
     last_name = Column(String(128))
-    places = relationship('Place', backref='user',  cascade='delete')
-    reviews = relationship('Review', backref='user',  cascade='delete')
+
+    if getenv('HBNB_TYPE_STORAGE') in ('db', 'sqlite'):
+        places = relationship('Place', backref='user',  cascade='delete')
+        reviews = relationship('Review', backref='user',  cascade='delete')
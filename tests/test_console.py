@@ -40,7 +40,7 @@ class TestHBNBCommand(unittest.TestCase):
         except IOError:
             pass
         del cls.HBNB
-        if type(models.storage) == DBStorage:
+        if isinstance(models.storage, DBStorage):
             models.storage._DBStorage__session.close()
 
     def setUp(self):
@@ -103,7 +103,8 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertEqual(
                 "** class doesn't exist **\n", w.getvalue())
 
-    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
     def test_create(self):
         """Testing create command."""
         with patch("sys.stdout", new=StringIO()) as w:
@@ -143,7 +144,8 @@ class TestHBNBCommand(unittest.TestCase):
             self.HBNB.onecmd("all Amenity")
             self.assertIn(amenity, w.getvalue())
 
-    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
     def test_create_kwargs(self):
         """Testing create command with kwargs."""
         with patch("sys.stdout", new=StringIO()) as w:
@@ -199,7 +201,23 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertEqual(
                 "** no instance found **\n", w.getvalue())
 
-    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
+    def test_destroy_saves_once(self):
+        """Destroying an instance writes the file once."""
+        with patch("sys.stdout", new=StringIO()) as w:
+            self.HBNB.onecmd("create State")
+            my_id = w.getvalue().strip()
+        write = FileStorage._FileStorage__write
+        with patch.object(FileStorage, '_FileStorage__write',
+                          autospec=True, side_effect=write) as write:
+            with patch("sys.stdout", new=StringIO()) as w:
+                self.HBNB.onecmd("destroy State " + my_id)
+        self.assertEqual(write.call_count, 1)
+        self.assertIsNone(models.storage.get("State", my_id))
+
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
     def test_all(self):
         """Testing all command input."""
         with patch('sys.stdout', new=StringIO()) as w:
@@ -209,7 +227,8 @@ class TestHBNBCommand(unittest.TestCase):
             self.HBNB.onecmd("all State")
             self.assertEqual("[]\n", w.getvalue())
 
-    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
     def test_update(self):
         """Testing update command input."""
         with patch("sys.stdout", new=StringIO()) as w:
@@ -241,7 +260,8 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertEqual(
                 "** value missing **\n", w.getvalue())
 
-    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
     def test_z_all(self):
         """Testing alternate all command."""
         with patch("sys.stdout", new=StringIO()) as w:
@@ -252,7 +272,8 @@ class TestHBNBCommand(unittest.TestCase):
             self.HBNB.onecmd("State.all()")
             self.assertEqual("[]\n", w.getvalue())
 
-    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
     def test_z_count(self):
         """Testing count command inpout"""
         with patch('sys.stdout', new=StringIO()) as w:
@@ -285,7 +306,8 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertEqual(
                 "** no instance found **\n", w.getvalue())
 
-    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    @unittest.skipIf(isinstance(models.storage, DBStorage),
+                     "Testing DBStorage")
     def test_update(self):
         """Testing alternate destroy command inpout"""
         with patch('sys.stdout', new=StringIO()) as w:
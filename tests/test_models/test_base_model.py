@@ -6,6 +6,8 @@ import datetime
 from uuid import UUID
 import json
 import os
+import models
+from unittest.mock import patch
 
 
 class test_basemodel(unittest.TestCase):
@@ -39,6 +41,16 @@ class test_basemodel(unittest.TestCase):
         new = BaseModel(**copy)
         self.assertFalse(new is i)
 
+    def test_kwargs_untouched(self):
+        """ Building an instance does not call the storage touch() hook,
+        setting an attribute does """
+        copy = self.value().to_dict()
+        with patch.object(models.storage, 'touch', create=True) as touch:
+            new = self.value(**copy)
+            self.assertEqual(touch.call_count, 0)
+            new.name = 'changed'
+            touch.assert_called_once_with(new, 'name', ...)
+
     def test_kwargs_int(self):
         """ """
         i = self.value()
@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+""" Module for testing the atomic replacement of the storage files"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from models.engine.atomic_file import replacing
+
+
+class test_atomic_file(unittest.TestCase):
+    """ Class to test replacing """
+
+    def setUp(self):
+        """ Write a file to replace in a new directory """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+        with open(self.path, 'w') as f:
+            f.write('{}')
+
+    def tearDown(self):
+        """ Remove the directory """
+        self.directory.cleanup()
+
+    def test_replace(self):
+        """ The file is replaced by what the block wrote, synced first """
+        with patch('os.fsync', wraps=os.fsync) as fsync:
+            with replacing(self.path) as f:
+                f.write('{"a": 1}')
+        fsync.assert_called_once()
+        with open(self.path, 'r') as f:
+            self.assertEqual(f.read(), '{"a": 1}')
+        self.assertEqual(os.listdir(self.directory.name), ['file.json'])
+
+    def test_error(self):
+        """ A failed write leaves the file and no temporary file """
+        for target in ('os.fsync', 'os.replace'):
+            with patch(target, side_effect=OSError):
+                with self.assertRaises(OSError):
+                    with replacing(self.path) as f:
+                        f.write('{"a"')
+            with open(self.path, 'r') as f:
+                self.assertEqual(f.read(), '{}')
+            self.assertEqual(os.listdir(self.directory.name),
+                             ['file.json'])
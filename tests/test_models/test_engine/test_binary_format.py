@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+""" Module for testing the binary FileStorage format"""
+import json
+import os
+import unittest
+from datetime import datetime
+from io import BytesIO
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine import binary_format
+from models.engine.file_storage import FileStorage
+
+
+class test_binary_format(unittest.TestCase):
+    """ Class to test binary_format and the binary mode of FileStorage """
+
+    def tearDown(self):
+        """ Remove storage files at end of tests """
+        FileStorage._FileStorage__objects.clear()
+        for path in ('file.json', 'file.hbnb'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def round_trip(self, records):
+        """ Returns records after a dump and a load """
+        f = BytesIO()
+        binary_format.dump(records, f)
+        f.seek(0)
+        return dict(binary_format.load(f))
+
+    def test_round_trip(self):
+        """ Records come back equal to their JSON form """
+        records = {}
+        for i in range(10):
+            city = {'__class__': 'City', 'id': 'c{}'.format(i),
+                    'state_id': 's1', 'name': 'City {}'.format(i),
+                    'created_at': '2017-03-25T02:17:06.000104',
+                    'updated_at': '2017-03-25T02:17:06'}
+            records['City.c{}'.format(i)] = city
+        records['Place.p1'] = {'__class__': 'Place', 'id': 'p1',
+                               'city_id': None, 'latitude': 37.77,
+                               'number_rooms': 4, 'amenity_ids': ['a'],
+                               'extra': {'nested': [1, True, None]},
+                               'created_at': '2017-03-25T02:17:06+00:00',
+                               'updated_at': 'yesterday'}
+        records['Place.other-key'] = {'__class__': 'Place', 'id': 'p2'}
+        loaded = self.round_trip(records)
+        self.assertEqual(loaded, records)
+        self.assertEqual(json.dumps(loaded, sort_keys=True),
+                         json.dumps(records, sort_keys=True))
+
+    def test_datetimes(self):
+        """ load(datetimes=True) parses each valid timestamp """
+        records = {'Place.p1': {'__class__': 'Place', 'id': 'p1',
+                                'created_at': '2017-03-25T02:17:06.000104',
+                                'updated_at': 'yesterday'},
+                   'Place.p2': {'__class__': 'Place', 'id': 'p2'}}
+        f = BytesIO()
+        binary_format.dump(records, f)
+        f.seek(0)
+        loaded = dict(binary_format.load(f, datetimes=True))
+        self.assertEqual(loaded['Place.p1']['created_at'],
+                         datetime(2017, 3, 25, 2, 17, 6, 104))
+        self.assertEqual(loaded['Place.p1']['updated_at'], 'yesterday')
+        self.assertEqual(loaded['Place.p2'], records['Place.p2'])
+
+    def test_compact(self):
+        """ Repeated keys and references are only stored once """
+        records = {'City.{}'.format(i): {'__class__': 'City',
+                                         'id': str(i), 'state_id': 's1',
+                                         'created_at': '2017-03-25T02:17:06'}
+                   for i in range(100)}
+        f = BytesIO()
+        binary_format.dump(records, f)
+        self.assertLess(len(f.getvalue()), len(json.dumps(records)) / 2)
+
+    def test_load_invalid(self):
+        """ A file in another format raises ValueError """
+        with self.assertRaises(ValueError):
+            binary_format.load(BytesIO(b'{}'))
+
+    def test_storage_binary(self):
+        """ HBNB_FILE_FORMAT=binary saves to and reloads from file.hbnb """
+        with patch.dict(os.environ, {'HBNB_FILE_FORMAT': 'binary'}):
+            storage = FileStorage()
+        new = BaseModel()
+        storage.new(new)
+        storage.save()
+        self.assertTrue(os.path.exists('file.hbnb'))
+        self.assertFalse(os.path.exists('file.json'))
+        FileStorage._FileStorage__objects.clear()
+        storage.reload()
+        key = 'BaseModel.' + new.id
+        self.assertEqual(storage.all()[key].to_dict(), new.to_dict())
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+""" Module for testing the read-through object cache"""
+import os
+import tempfile
+import unittest
+from models.state import State
+from models.city import City
+from models.engine.cached_storage import CachedStorage
+from models.engine.sqlite_storage import SQLiteStorage
+
+
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                 "This test only work in SQLiteStorage")
+class test_cached_storage(unittest.TestCase):
+    """ Class to test the object cache in front of SQLiteStorage """
+
+    def setUp(self):
+        """ Open a cached storage on a new database file """
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, 'hbnb.db')
+        self.storage = CachedStorage(SQLiteStorage(path), size=4, ttl=60)
+        self.state = State(name='California')
+        self.storage.new(self.state)
+        self.storage.new(City(name='Fremont', state_id=self.state.id))
+        self.storage.save()
+        self.storage.close()
+
+    def tearDown(self):
+        """ Close the storage and remove the database """
+        self.storage.close()
+        self.directory.cleanup()
+
+    def test_hits(self):
+        """ Repeated reads are answered from the cache """
+        first = self.storage.all(State)
+        self.storage.close()
+        second = self.storage.all(State)
+        self.assertEqual(list(first), list(second))
+        self.assertIsNot(first['State.' + self.state.id],
+                         second['State.' + self.state.id])
+        self.storage.get(State, self.state.id)
+        state = self.storage.get(State, self.state.id)
+        self.assertEqual([city.name for city in state.cities], ['Fremont'])
+        stats = self.storage.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_query_filter(self):
+        """ query() and filter() are cached by their arguments """
+        first = self.storage.query(State, name__in=['California', 'Ohio'])
+        second = self.storage.filter(
+            State, [('name', 'in', ['California', 'Ohio'])])
+        self.assertEqual(list(first), ['State.' + self.state.id])
+        self.assertEqual(list(second), list(first))
+        self.assertEqual(self.storage.query(State, name='Ohio'), {})
+        stats = self.storage.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.storage.new(State(name='Ohio'))
+        self.storage.save()
+        self.assertEqual(len(self.storage.query(
+            State, name__in=['California', 'Ohio'])), 2)
+
+    def test_invalidate(self):
+        """ Writes empty the cache """
+        self.storage.all(State)
+        self.storage.new(State(name='Nevada'))
+        self.storage.save()
+        self.assertEqual(len(self.storage.all(State)), 2)
+        stats = self.storage.cache_stats()
+        self.assertEqual(stats['hits'], 0)
+        self.assertGreaterEqual(stats['invalidations'], 1)
+
+    def test_evictions(self):
+        """ The least recently used entries go past the size """
+        states = [State(name=str(i)) for i in range(5)]
+        self.storage.bulk_insert(State, [state.to_dict()
+                                         for state in states])
+        for state in states:
+            self.storage.get(State, state.id)
+        self.assertIsNotNone(self.storage.get(State, states[4].id))
+        self.assertEqual(len(self.storage.all(State)), 6)
+        stats = self.storage.cache_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['objects'], 4)
+
+    def test_ttl(self):
+        """ Entries expire after ttl seconds """
+        self.storage.ttl = -1
+        self.storage.get(State, self.state.id)
+        self.storage.get(State, self.state.id)
+        self.assertEqual(self.storage.cache_stats()['expirations'], 1)
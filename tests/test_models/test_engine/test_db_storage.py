@@ -55,16 +55,16 @@ class TestDBStorage(unittest.TestCase):
         objec = storage.all()
         self.assertIsNotNone(objec)
         self.assertEqual(type(objec), dict)
-        self.assertIs(objec, storage._FileStorage__objects)
+        self.assertEqual(objec, storage._FileStorage__objects)
 
     def test_new(self):
         """testing in case new one was created"""
         storage = FileStorage()
-        objec = storage.all()
         user_new = User()
         user_new.id = 123455
         user_new.name = "Kevin"
         storage.new(user_new)
+        objec = storage.all()
         key = user_new.__class__.__name__ + "." + str(user_new.id)
         self.assertIsNotNone(objec[key])
 
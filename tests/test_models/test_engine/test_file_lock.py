@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+""" Module for testing FileStorage shared between processes"""
+import glob
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+from models.state import State
+from models.engine.file_storage import FileStorage
+from models.engine.journal import Journal
+
+CHILD = """
+import sys
+from models import storage
+from models.state import State
+if sys.argv[1] == 'delete':
+    storage.delete(storage.get(State, sys.argv[2]))
+for i in range(int(sys.argv[1]) if sys.argv[1] != 'delete' else 0):
+    storage.new(State(name=sys.argv[2]))
+    storage.save()
+"""
+
+
+class test_file_lock(unittest.TestCase):
+    """ Class to test several processes sharing file.json """
+
+    def setUp(self):
+        """ Set up a shared storage with an empty __objects """
+        FileStorage._FileStorage__objects.clear()
+        with patch.dict(os.environ, {'HBNB_FILE_SHARED': '1'}):
+            self.storage = FileStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Remove storage files at end of tests """
+        FileStorage._FileStorage__objects.clear()
+        for path in ('file.json', 'file.json.lock', 'file.json.log',
+                     'file.json.log.1'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        for path in glob.glob('file.json.*.tmp'):
+            os.remove(path)
+
+    def child(self, *args, **environ):
+        """ Starts a process saving through a shared storage """
+        environ = dict(os.environ, HBNB_FILE_SHARED='1', **environ)
+        environ.pop('HBNB_TYPE_STORAGE', None)
+        return subprocess.Popen([sys.executable, '-c', CHILD] +
+                                [str(arg) for arg in args], env=environ)
+
+    def names(self, objects):
+        """ Returns the sorted names of objects """
+        return sorted(obj.name for obj in objects.values())
+
+    def test_reads_other_writes(self):
+        """ Reads see what another process saved or deleted """
+        state = State(name='Parent')
+        self.storage.new(state)
+        self.storage.save()
+        self.assertEqual(self.child(1, 'Child').wait(), 0)
+        self.assertEqual(self.names(self.storage.all(State)),
+                         ['Child', 'Parent'])
+        self.assertEqual(self.child('delete', state.id).wait(), 0)
+        self.assertIsNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.count(State), 1)
+
+    def test_no_lost_update(self):
+        """ A save keeps what another process saved since the last read """
+        self.storage.new(State(name='First'))
+        self.storage.save()
+        self.assertEqual(self.child(1, 'Child').wait(), 0)
+        self.storage.new(State(name='Second'))
+        self.storage.save()
+        with open('file.json', 'r') as f:
+            names = sorted(record['name'] for record in json.load(f).values())
+        self.assertEqual(names, ['Child', 'First', 'Second'])
+
+    def test_concurrent_writers(self):
+        """ Processes saving at the same time lose no object """
+        children = [self.child(10, 'Child {}'.format(i)) for i in range(4)]
+        for i in range(10):
+            self.storage.new(State(name='Parent'))
+            self.storage.save()
+        for child in children:
+            self.assertEqual(child.wait(), 0)
+        self.assertEqual(self.storage.count(State), 50)
+        with open('file.json', 'r') as f:
+            self.assertEqual(len(json.load(f)), 50)
+
+    def test_journal_compaction(self):
+        """ Compactions in several processes lose no journaled object """
+        environ = {'HBNB_FILE_MODE': 'journal',
+                   'HBNB_JOURNAL_MAX_RECORDS': '3'}
+        with patch.dict(os.environ, HBNB_FILE_SHARED='1', **environ):
+            storage = FileStorage()
+        children = [self.child(10, 'Child {}'.format(i), **environ)
+                    for i in range(4)]
+        for i in range(10):
+            storage.new(State(name='Parent'))
+            storage.save()
+            storage.compact()
+        for child in children:
+            self.assertEqual(child.wait(), 0)
+        self.assertEqual(len(Journal('file.json').load()), 50)
@@ -3,7 +3,10 @@
 import unittest
 from models.base_model import BaseModel
 from models import storage
+import json
 import os
+import threading
+from unittest.mock import patch
 
 
 class test_fileStorage(unittest.TestCase):
@@ -102,6 +105,426 @@ class test_fileStorage(unittest.TestCase):
             temp = key
         self.assertEqual(temp, 'BaseModel' + '.' + _id)
 
+    def test_all_cls(self):
+        """ all(cls) only returns the objects of that class """
+        class Other(BaseModel):
+            """ Second class to bucket """
+        new = BaseModel()
+        other = Other()
+        storage.new(new)
+        storage.new(other)
+        self.assertEqual(list(storage.all(BaseModel).keys()),
+                         ['BaseModel.' + new.id])
+        self.assertEqual(list(storage.all('Other').keys()),
+                         ['Other.' + other.id])
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_all_cls_delete(self):
+        """ Deleted objects leave their class bucket """
+        new = BaseModel()
+        storage.new(new)
+        storage.delete(new)
+        self.assertEqual(storage.all(BaseModel), {})
+
+    def test_all_cls_replaced_objects(self):
+        """ Buckets follow __objects when it is changed directly """
+        new = BaseModel()
+        storage.new(new)
+        del storage._FileStorage__objects['BaseModel.' + new.id]
+        self.assertEqual(storage.all(BaseModel), {})
+        storage._FileStorage__objects['BaseModel.' + new.id] = new
+        self.assertEqual(len(storage.all(BaseModel)), 1)
+
+    def test_related(self):
+        """ Relationship properties are answered from the reverse index """
+        from models.state import State
+        from models.city import City
+        state = State()
+        city = City(state_id=state.id)
+        other = City(state_id='elsewhere')
+        for obj in (state, city, other):
+            storage.new(obj)
+        self.assertEqual(state.cities, [city])
+        city.state_id = 'elsewhere'
+        storage.new(city)
+        self.assertEqual(state.cities, [])
+        self.assertEqual(len(storage.related(City, 'state_id',
+                                             'elsewhere')), 2)
+        storage.delete(other)
+        self.assertEqual(list(storage.related(City, 'state_id',
+                                              'elsewhere').values()),
+                         [city])
+
+    def test_related_amenities(self):
+        """ amenity_ids links are indexed both ways """
+        from models.place import Place
+        from models.amenity import Amenity
+        place = Place()
+        amenity = Amenity()
+        storage.new(amenity)
+        place.amenities = amenity
+        storage.new(place)
+        self.assertEqual(place.amenities, [amenity])
+        self.assertEqual(Place().amenity_ids, [])
+        self.assertEqual(list(storage.related(Place, 'amenity_ids',
+                                              amenity.id).values()),
+                         [place])
+
+    def test_query(self):
+        """ query() filters, orders and limits the objects of a class """
+        from models.place import Place
+        places = [Place(city_id='c{}'.format(i % 2), price_by_night=i)
+                  for i in range(6)]
+        for place in places:
+            storage.new(place)
+        found = storage.query(Place, city_id='c0', price_by_night__gt=0)
+        self.assertEqual(list(found.values()), places[2::2])
+        found = storage.query('Place', order_by='-price_by_night', limit=2,
+                              price_by_night__in=[1, 2, 3])
+        self.assertEqual(list(found.values()), [places[3], places[2]])
+        found = storage.query(Place, id=places[1].id)
+        self.assertEqual(found, {'Place.' + places[1].id: places[1]})
+        with self.assertRaises(ValueError):
+            storage.query(Place, price_by_night__near=3)
+
+    def test_filter_touched(self):
+        """ filter() follows foreign keys changed by assignment """
+        from models.city import City
+        city = City(state_id='here')
+        storage.new(city)
+        city.state_id = 'there'
+        self.assertEqual(storage.filter(City, [('state_id', 'eq', 'here')]),
+                         {})
+        self.assertEqual(list(storage.filter(
+            City, [('state_id', 'eq', 'there')]).values()), [city])
+
+    def test_reload_lazy(self):
+        """ A lazy reload only builds a class when it is read """
+        from models.engine.file_storage import FileStorage
+        from unittest.mock import patch
+        new = BaseModel()
+        with open('file.json', 'w') as f:
+            json.dump({'BaseModel.' + new.id: new.to_dict()}, f)
+        with patch.dict(os.environ, {'HBNB_FILE_LOAD': 'lazy'}):
+            lazy = FileStorage()
+        lazy.reload()
+        self.assertEqual(len(storage._FileStorage__objects), 0)
+        lazy.save()
+        self.assertEqual(len(storage._FileStorage__objects), 0)
+        objects = lazy.all(BaseModel)
+        self.assertEqual(objects['BaseModel.' + new.id].to_dict(),
+                         new.to_dict())
+        self.assertEqual(len(storage._FileStorage__objects), 1)
+
+    def test_save_crash(self):
+        """ A save that fails while writing leaves file.json whole """
+        new = BaseModel()
+        new.save()
+        with open('file.json', 'r') as f:
+            saved = f.read()
+        new.name = 'changed'
+        with patch('os.fsync', side_effect=OSError):
+            with self.assertRaises(OSError):
+                new.save()
+        with open('file.json', 'r') as f:
+            self.assertEqual(f.read(), saved)
+
+    def test_close_unchanged(self):
+        """ close() does not read the file again when it did not change """
+        from models.engine.file_storage import FileStorage
+        new = BaseModel()
+        new.save()
+        storage.reload()
+        loaded = storage.all()['BaseModel.' + new.id]
+        with patch.object(FileStorage, '_FileStorage__read') as read:
+            storage.close()
+        read.assert_not_called()
+        self.assertIs(storage.all()['BaseModel.' + new.id], loaded)
+
+    def test_close_changed(self):
+        """ close() reads a changed file, but keeps the unchanged objects """
+        first = BaseModel()
+        second = BaseModel()
+        first.save()
+        second.save()
+        with open('file.json', 'r') as f:
+            records = json.load(f)
+        records['BaseModel.' + second.id]['name'] = 'changed'
+        with open('file.json', 'w') as f:
+            json.dump(records, f)
+        os.utime('file.json', ns=(0, 0))
+        storage.close()
+        objects = storage.all()
+        self.assertIs(objects['BaseModel.' + first.id], first)
+        self.assertIsNot(objects['BaseModel.' + second.id], second)
+        self.assertEqual(objects['BaseModel.' + second.id].name, 'changed')
+
+    def test_get_count_lazy(self):
+        """ get() and count() do not build the other lazy records """
+        from models.engine.file_storage import FileStorage
+        first = BaseModel()
+        second = BaseModel()
+        with open('file.json', 'w') as f:
+            json.dump({'BaseModel.' + first.id: first.to_dict(),
+                       'BaseModel.' + second.id: second.to_dict()}, f)
+        with patch.dict(os.environ, {'HBNB_FILE_LOAD': 'lazy'}):
+            lazy = FileStorage()
+        lazy.reload()
+        self.assertEqual(lazy.count(), 2)
+        self.assertEqual(lazy.count('BaseModel'), 2)
+        self.assertEqual(lazy.get(BaseModel, first.id).to_dict(),
+                         first.to_dict())
+        self.assertEqual(len(storage._FileStorage__objects), 1)
+        self.assertIsNone(lazy.get(BaseModel, 'missing'))
+        self.assertEqual(lazy.count(BaseModel), 2)
+        self.assertEqual(len(lazy.all(BaseModel)), 2)
+
+    def test_amenities_lazy(self):
+        """ place.amenities only builds the linked amenities """
+        from models.engine.file_storage import FileStorage
+        from models.amenity import Amenity
+        from models.place import Place
+        from models.state import State
+        amenity = Amenity(name='Wifi')
+        place = Place(amenity_ids=[amenity.id])
+        records = {type(obj).__name__ + '.' + obj.id: obj.to_dict()
+                   for obj in (amenity, place, State(), Amenity())}
+        with open('file.json', 'w') as f:
+            json.dump(records, f)
+        with patch.dict(os.environ, {'HBNB_FILE_LOAD': 'lazy'}):
+            lazy = FileStorage()
+        lazy.reload()
+        amenities = lazy.get(Place, place.id).amenities
+        self.assertEqual([obj.id for obj in amenities], [amenity.id])
+        self.assertEqual(len(storage._FileStorage__objects), 2)
+        self.assertEqual(len(lazy.all()), 4)
+
+    def test_page_iter(self):
+        """ page() and iter() walk a class in id order """
+        from models.state import State
+        states = [State() for i in range(5)]
+        for state in states:
+            storage.new(state)
+        storage.new(BaseModel())
+        states.sort(key=lambda state: state.id)
+        page = storage.page(State, limit=2)
+        self.assertEqual(list(page.values()), states[:2])
+        page = storage.page('State', states[1].id, 2)
+        self.assertEqual(list(page.values()), states[2:4])
+        storage.delete(states[2])
+        new = State(id=states[1].id + '0')
+        storage.new(new)
+        page = storage.page('State', states[1].id, 2)
+        self.assertEqual(list(page.values()), [new, states[3]])
+        self.assertEqual(list(storage.iter(State, batch_size=2)),
+                         states[:2] + [new] + states[3:])
+        self.assertEqual(len(list(storage.iter(batch_size=2))), 6)
+
+    def test_bulk_insert(self):
+        """ bulk_insert() stores to_dict() rows with a single save """
+        from models.state import State
+        from models.engine.file_storage import FileStorage
+        state = State(name='California')
+        rows = [state.to_dict(), {'name': 'Texas'}]
+        with patch.object(FileStorage, 'save',
+                          autospec=True,
+                          side_effect=FileStorage.save) as save:
+            self.assertEqual(storage.bulk_insert('State', rows), 2)
+            self.assertEqual(save.call_count, 1)
+        self.assertEqual(storage.get(State, state.id).to_dict(),
+                         state.to_dict())
+        self.assertEqual(storage.count(State), 2)
+        with open('file.json', 'r') as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def test_batch(self):
+        """ Saves inside a batch are flushed once on exit """
+        with storage.batch():
+            for i in range(3):
+                BaseModel().save()
+            self.assertFalse(os.path.exists('file.json'))
+        with open('file.json', 'r') as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_batch_exception(self):
+        """ A batch left by an exception is discarded """
+        kept = BaseModel()
+        kept.save()
+        with self.assertRaises(RuntimeError):
+            with storage.transaction():
+                BaseModel().save()
+                storage.delete(kept)
+                raise RuntimeError()
+        self.assertEqual(list(storage.all(BaseModel).keys()),
+                         ['BaseModel.' + kept.id])
+        with open('file.json', 'r') as f:
+            self.assertEqual(list(json.load(f)), ['BaseModel.' + kept.id])
+
+    def test_batch_exception_attributes(self):
+        """ A batch left by an exception puts back the attributes set """
+        kept = BaseModel(name='kept')
+        kept.save()
+        with self.assertRaises(RuntimeError):
+            with storage.batch():
+                kept.name = 'changed'
+                kept.number = 1
+                kept.save()
+                raise RuntimeError()
+        self.assertEqual(kept.name, 'kept')
+        self.assertFalse(hasattr(kept, 'number'))
+        storage.new(BaseModel())
+        storage.save()
+        with open('file.json', 'r') as f:
+            saved = json.load(f)['BaseModel.' + kept.id]
+        self.assertEqual(saved['name'], 'kept')
+        self.assertNotIn('number', saved)
+
+    def test_all_snapshot(self):
+        """ all() hands out a snapshot that new() does not change """
+        new = BaseModel()
+        storage.new(new)
+        snapshot = storage.all()
+        storage.new(BaseModel())
+        self.assertEqual(list(snapshot), ['BaseModel.' + new.id])
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_all_copy(self):
+        """ Changing what all() returns leaves the storage as it is """
+        new = BaseModel()
+        storage.new(new)
+        storage.all().clear()
+        self.assertEqual(list(storage.all()), ['BaseModel.' + new.id])
+
+    def test_save_cached(self):
+        """ save() serializes again only the objects changed """
+        first = BaseModel()
+        second = BaseModel()
+        storage.new(first)
+        storage.new(second)
+        storage.save()
+        with patch.object(BaseModel, 'to_dict',
+                          autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            storage.save()
+            self.assertEqual(to_dict.call_count, 0)
+            first.name = 'changed'
+            storage.save()
+            self.assertEqual(to_dict.call_count, 1)
+        with open('file.json', 'r') as f:
+            saved = json.load(f)
+        self.assertEqual(saved['BaseModel.' + first.id]['name'], 'changed')
+        self.assertEqual(saved['BaseModel.' + second.id], second.to_dict())
+
+    def test_events(self):
+        """ Saved changes are published to the subscribers """
+        events = []
+        queued = []
+        subscriber = storage.events.subscribe(events.append)
+        worker = storage.events.subscribe(queued.append, queued=True,
+                                          kinds=('deleted',))
+        try:
+            new = BaseModel()
+            new.name = 'first'
+            new.save()
+            new.name = 'second'
+            new.save()
+            with storage.batch():
+                dropped = BaseModel()
+                dropped.save()
+                storage.delete(dropped)
+            storage.delete(new)
+            worker.flush()
+        finally:
+            storage.events.unsubscribe(subscriber)
+            storage.events.unsubscribe(worker)
+        self.assertEqual([(event.kind, event.id) for event in events],
+                         [('created', new.id), ('updated', new.id),
+                          ('deleted', new.id)])
+        self.assertIn('name', events[0].fields)
+        self.assertEqual(events[1].fields, {'name', 'updated_at'})
+        self.assertEqual(events[2].cls, 'BaseModel')
+        self.assertEqual(queued, [events[2]])
+
+    def test_threads(self):
+        """ Concurrent readers and writers see consistent storage """
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            """ Walks the snapshots until the writers are done """
+            try:
+                while not stop.is_set():
+                    for key, obj in storage.all().items():
+                        self.assertEqual(key, 'BaseModel.' + obj.id)
+                    len(storage.all(BaseModel))
+            except Exception as error:
+                errors.append(error)
+
+        def write():
+            """ Creates, saves and deletes objects """
+            try:
+                for i in range(20):
+                    new = BaseModel()
+                    new.save()
+                    if i % 2:
+                        storage.delete(new)
+            except Exception as error:
+                errors.append(error)
+
+        readers = [threading.Thread(target=read) for i in range(4)]
+        writers = [threading.Thread(target=write) for i in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(storage.all()), 40)
+        self.assertEqual(len(storage.all(BaseModel)), 40)
+        with open('file.json', 'r') as f:
+            self.assertEqual(len(json.load(f)), 40)
+
+    def test_batch_threads(self):
+        """ A batch only holds the changes of the thread running it """
+        kept = BaseModel(name='kept')
+        kept.save()
+        opened = threading.Event()
+        saved = threading.Event()
+        batched = []
+
+        def run():
+            """ Changes objects in a batch left by an exception """
+            try:
+                with storage.batch():
+                    kept.name = 'changed'
+                    kept.save()
+                    batched.append(BaseModel())
+                    batched[0].save()
+                    opened.set()
+                    saved.wait(5)
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        opened.wait(5)
+        other = BaseModel()
+        other.save()
+        with open('file.json', 'r') as f:
+            records = json.load(f)
+        saved.set()
+        thread.join()
+        self.assertEqual(sorted(records), sorted(['BaseModel.' + kept.id,
+                                                  'BaseModel.' + other.id]))
+        self.assertEqual(records['BaseModel.' + kept.id]['name'], 'kept')
+        self.assertEqual(sorted(storage.all()),
+                         sorted(['BaseModel.' + kept.id,
+                                 'BaseModel.' + other.id]))
+        self.assertEqual(kept.name, 'kept')
+
     def test_storage_var_created(self):
         """ FileStorage object storage created """
         from models.engine.file_storage import FileStorage
@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+""" Module for testing the FileStorage journal"""
+import glob
+import json
+import os
+import time
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.file_lock import FileLock
+from models.engine.file_storage import FileStorage
+from models.engine.journal import Journal
+
+
+class test_journal(unittest.TestCase):
+    """ Class to test the journaled mode of FileStorage """
+
+    def setUp(self):
+        """ Set up a journaled storage with an empty __objects """
+        FileStorage._FileStorage__objects.clear()
+        with patch.dict(os.environ, {'HBNB_FILE_MODE': 'journal'}):
+            self.storage = FileStorage()
+
+    def tearDown(self):
+        """ Remove storage files at end of tests """
+        FileStorage._FileStorage__objects.clear()
+        for path in ('file.json', 'file.json.log', 'file.json.log.1',
+                     'file.json.lock'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        for path in glob.glob('file.json.*.tmp'):
+            os.remove(path)
+
+    def read_log(self):
+        """ Returns the records of the log """
+        with open('file.json.log', 'r') as f:
+            return [json.loads(line) for line in f]
+
+    def test_save_appends(self):
+        """ save() appends the changed object instead of a snapshot """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.assertFalse(os.path.exists('file.json'))
+        records = self.read_log()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0][:2], ['+', 'BaseModel.' + new.id])
+
+    def test_save_only_changed(self):
+        """ Objects untouched since the last save are not logged again """
+        first = BaseModel()
+        self.storage.new(first)
+        self.storage.save()
+        second = BaseModel()
+        self.storage.new(second)
+        self.storage.save()
+        keys = [record[1] for record in self.read_log()]
+        self.assertEqual(keys, ['BaseModel.' + first.id,
+                                'BaseModel.' + second.id])
+
+    def test_delete_tombstone(self):
+        """ delete() appends a tombstone """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.storage.delete(new)
+        self.assertEqual(self.read_log()[-1], ['-', 'BaseModel.' + new.id])
+
+    def test_reload_replays(self):
+        """ reload() replays the log over the snapshot """
+        kept = BaseModel()
+        gone = BaseModel()
+        with open('file.json', 'w') as f:
+            json.dump({'BaseModel.' + gone.id: gone.to_dict()}, f)
+        self.storage.new(kept)
+        self.storage.save()
+        self.storage.new(gone)
+        self.storage.delete(gone)
+        FileStorage._FileStorage__objects.clear()
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all().keys()),
+                         ['BaseModel.' + kept.id])
+
+    def test_replay_truncated(self):
+        """ A partially written last record is ignored """
+        new = BaseModel()
+        with open('file.json.log', 'w') as f:
+            f.write(json.dumps(['+', 'BaseModel.1', new.to_dict()]) + '\n')
+            f.write('["+", "BaseModel.2", {"id"')
+        records = {}
+        journal = Journal('file.json')
+        self.assertEqual(journal.replay(records), 1)
+        self.assertEqual(list(records.keys()), ['BaseModel.1'])
+        journal.append({'BaseModel.3': new.to_dict()}, [])
+        self.assertEqual(list(journal.load()),
+                         ['BaseModel.1', 'BaseModel.3'])
+
+    def test_compact(self):
+        """ compact() folds the log into file.json and records stats """
+        kept = BaseModel()
+        gone = BaseModel()
+        self.storage.new(kept)
+        self.storage.new(gone)
+        self.storage.save()
+        self.storage.delete(gone)
+        stats = self.storage.compact()
+        self.assertEqual(stats['runs'], 1)
+        self.assertEqual(stats['records_dropped'], 2)
+        self.assertFalse(os.path.exists('file.json.log'))
+        self.assertFalse(os.path.exists('file.json.log.1'))
+        with open('file.json', 'r') as f:
+            self.assertEqual(list(json.load(f).keys()),
+                             ['BaseModel.' + kept.id])
+
+    def test_reload_rotated(self):
+        """ A log left by an interrupted compaction is still replayed """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        os.rename('file.json.log', 'file.json.log.1')
+        FileStorage._FileStorage__objects.clear()
+        self.storage.reload()
+        self.assertIn('BaseModel.' + new.id, self.storage.all())
+
+    def test_background_compaction(self):
+        """ Passing max_records triggers a compaction in the background """
+        journal = Journal('file.json', max_records=2)
+        journal.append({'BaseModel.1': BaseModel().to_dict()}, [])
+        self.assertEqual(journal.stats['runs'], 0)
+        journal.append({}, ['BaseModel.1'])
+        for _ in range(100):
+            if journal.stats['runs']:
+                break
+            time.sleep(0.05)
+        self.assertEqual(journal.stats['runs'], 1)
+        self.assertEqual(journal.load(), {})
+
+    def test_compact_locked(self):
+        """ compact() holds the shared lock to rotate and replace """
+        lock = FileLock('file.json.lock')
+        journal = Journal('file.json', lock=lock)
+        journal.append({'BaseModel.1': BaseModel().to_dict()}, [])
+        with patch.object(lock, 'hold', wraps=lock.hold) as hold:
+            journal.compact()
+        self.assertEqual(hold.call_count, 2)
+        for call in hold.call_args_list:
+            self.assertEqual(call.kwargs, {'exclusive': True})
+
+    def test_compact_folded_meanwhile(self):
+        """ A log another process folded meanwhile is not folded again """
+        journal = Journal('file.json')
+        other = Journal('file.json')
+        journal.append({'BaseModel.1': BaseModel().to_dict()}, [])
+        replay = Journal.replay
+
+        def fold(self, records, path=None):
+            """ Lets the other journal fold the log first """
+            if self is journal:
+                other.compact()
+                other.append({'BaseModel.2': BaseModel().to_dict()}, [])
+                other.compact()
+            return replay(self, records, path)
+
+        with patch.object(Journal, 'replay', fold):
+            self.assertIsNone(journal.compact())
+        self.assertEqual(sorted(Journal('file.json').load()),
+                         ['BaseModel.1', 'BaseModel.2'])
+
+    def test_compact_error(self):
+        """ A failed compaction leaves no temporary file """
+        journal = Journal('file.json')
+        journal.append({'BaseModel.1': BaseModel().to_dict()}, [])
+        with patch('json.dump', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                journal.compact()
+        self.assertEqual(glob.glob('file.json.*.tmp'), [])
+        self.assertIn('disk full', journal.stats['last_error'])
+        self.assertEqual(list(journal.load()), ['BaseModel.1'])
+
+    def test_close(self):
+        """ close() lets the running compaction finish and stops the
+        thread
+        """
+        journal = Journal('file.json', max_records=1)
+        journal.append({'BaseModel.1': BaseModel().to_dict()}, [])
+        journal.close()
+        self.assertEqual(glob.glob('file.json.*.tmp'), [])
+        journal.append({'BaseModel.2': BaseModel().to_dict()}, [])
+        time.sleep(0.1)
+        self.assertTrue(os.path.exists('file.json.log'))
+        self.assertEqual(sorted(journal.load()),
+                         ['BaseModel.1', 'BaseModel.2'])
@@ -0,0 +1,29 @@
+#!/usr/bin/python3
+""" Module for testing the incremental JSON reader"""
+import json
+import unittest
+from io import StringIO
+from models.engine.json_stream import iter_items
+
+
+class test_json_stream(unittest.TestCase):
+    """ Class to test iter_items """
+
+    def test_items(self):
+        """ Values split across chunks are decoded whole """
+        data = {'State.{}'.format(i): {'id': str(i), 'name': 'x' * i,
+                                       'n': i * 1000, 'l': [1.5, None]}
+                for i in range(50)}
+        for chunk_size in (1, 7, 1 << 16):
+            items = iter_items(StringIO(json.dumps(data)), chunk_size)
+            self.assertEqual(dict(items), data)
+
+    def test_empty_object(self):
+        """ An empty object yields nothing """
+        self.assertEqual(list(iter_items(StringIO(' {} '))), [])
+
+    def test_invalid(self):
+        """ Invalid or empty text raises ValueError """
+        for text in ('', '[]', '{"a": 1', '{"a": 1 "b": 2}'):
+            with self.assertRaises(ValueError):
+                list(iter_items(StringIO(text), 2))
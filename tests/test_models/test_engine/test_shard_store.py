@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+""" Module for testing the sharded FileStorage layout"""
+import json
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.engine.shard_store import ShardStore
+
+
+class test_shard_store(unittest.TestCase):
+    """ Class to test the sharded mode of FileStorage """
+
+    def setUp(self):
+        """ Set up a sharded storage with an empty __objects """
+        FileStorage._FileStorage__objects.clear()
+        with patch.dict(os.environ, {'HBNB_FILE_MODE': 'sharded'}):
+            self.storage = FileStorage()
+
+    def tearDown(self):
+        """ Remove storage files at end of tests """
+        FileStorage._FileStorage__objects.clear()
+        shutil.rmtree('file.json.d', ignore_errors=True)
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_save_per_class(self):
+        """ Objects are saved in one file per class """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.assertFalse(os.path.exists('file.json'))
+        with open('file.json.d/BaseModel.json', 'r') as f:
+            self.assertEqual(list(json.load(f)), ['BaseModel.' + new.id])
+
+    def test_save_dirty_shards(self):
+        """ Only the shards holding changed keys are rewritten """
+        store = ShardStore('file.json.d', shards={'BaseModel': 4})
+        records = {'BaseModel.{}'.format(i): {'id': str(i)}
+                   for i in range(20)}
+        self.assertEqual(store.save(records, [], records.get), 4)
+        self.assertEqual(len(os.listdir('file.json.d')), 4)
+        self.assertEqual(store.save(['BaseModel.3'], [], records.get), 1)
+        self.assertEqual(store.save([], ['BaseModel.3'], records.get), 1)
+
+    def test_load_parallel(self):
+        """ Shards loaded by a process pool hold every record """
+        store = ShardStore('file.json.d', shards={'BaseModel': 4})
+        records = {'BaseModel.{}'.format(i): {'id': str(i)}
+                   for i in range(20)}
+        store.save(records, [], records.get)
+        loaded = ShardStore('file.json.d', shards={'BaseModel': 4},
+                            workers=2).load()
+        self.assertEqual(dict(loaded), records)
+
+    def test_reload(self):
+        """ reload() reads the shards back """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        FileStorage._FileStorage__objects.clear()
+        self.storage.reload()
+        self.assertIn('BaseModel.' + new.id, self.storage.all())
+
+    def test_split_plain_file(self):
+        """ A plain file.json is split into shards by the next save """
+        new = BaseModel()
+        with open('file.json', 'w') as f:
+            json.dump({'BaseModel.' + new.id: new.to_dict()}, f)
+        self.storage.reload()
+        self.storage.save()
+        self.assertTrue(os.path.exists('file.json.d/BaseModel.json'))
+
+    def test_export(self):
+        """ export() writes the plain JSON file """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.export()
+        with open('file.json', 'r') as f:
+            self.assertEqual(json.load(f), {'BaseModel.' + new.id:
+                                            new.to_dict()})
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+""" Module for testing the memory-mapped snapshot storage"""
+import io
+import os
+import unittest
+from unittest.mock import patch
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.engine.file_storage import FileStorage
+from models.engine.snapshot_format import Snapshot
+from models.engine.snapshot_storage import SnapshotStorage
+
+
+class test_snapshot_storage(unittest.TestCase):
+    """ Class to test the snapshot exporter and SnapshotStorage """
+
+    def setUp(self):
+        """ Export a snapshot of a few objects and map it """
+        FileStorage._FileStorage__objects.clear()
+        self.storage = FileStorage()
+        self.state = State(name='California')
+        self.other = State(name='Arizona')
+        self.city = City(name='Fremont', state_id=self.state.id)
+        self.place = Place(name='Loft', city_id=self.city.id,
+                           amenity_ids=['a1', 'a2'])
+        for obj in (self.state, self.other, self.city, self.place):
+            self.storage.new(obj)
+        self.storage.save()
+        self.storage.snapshot('file.snap')
+        self.snapshot = SnapshotStorage('file.snap')
+        self.snapshot.reload()
+
+    def tearDown(self):
+        """ Remove the snapshot at end of tests """
+        FileStorage._FileStorage__objects.clear()
+        for path in ('file.json', 'file.snap'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_all_get(self):
+        """ all() and get() find the exported objects """
+        states = self.snapshot.all(State)
+        self.assertEqual(sorted(states), sorted(['State.' + self.state.id,
+                                                 'State.' + self.other.id]))
+        state = states['State.' + self.state.id]
+        self.assertIsInstance(state, State)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+        self.assertEqual(len(self.snapshot.all()), 4)
+        self.assertEqual(self.snapshot.count(), 4)
+        self.assertEqual(self.snapshot.count('State'), 2)
+        self.assertEqual(self.snapshot.get('City', self.city.id).name,
+                         'Fremont')
+        self.assertIsNone(self.snapshot.get(City, 'missing'))
+
+    def test_on_demand(self):
+        """ Only the records read are decoded """
+        with patch.object(Snapshot, 'record', autospec=True,
+                          side_effect=Snapshot.record) as record:
+            states = self.snapshot.all(State)
+            self.assertEqual(record.call_count, 0)
+            states['State.' + self.state.id]
+            states['State.' + self.state.id]
+            self.assertEqual(record.call_count, 1)
+
+    def test_related_query(self):
+        """ related() and query() use the reverse indexes """
+        cities = self.snapshot.related(City, 'state_id', self.state.id)
+        self.assertEqual(list(cities), ['City.' + self.city.id])
+        places = self.snapshot.related(Place, 'amenity_ids', 'a2')
+        self.assertEqual(list(places), ['Place.' + self.place.id])
+        states = self.snapshot.query(State, order_by='name', limit=1)
+        self.assertEqual([state.name for state in states.values()],
+                         ['Arizona'])
+        cities = self.snapshot.query(City, state_id=self.other.id)
+        self.assertEqual(cities, {})
+
+    def test_read_only(self):
+        """ Writes are refused """
+        with self.assertRaises(io.UnsupportedOperation):
+            self.snapshot.new(State(name='Nevada'))
+        with self.assertRaises(io.UnsupportedOperation):
+            self.snapshot.save()
+
+    def test_close_remaps(self):
+        """ close() maps a snapshot exported again, unmapping the old one """
+        states = self.snapshot.all(State)
+        state = states['State.' + self.state.id]
+        self.storage.delete(self.other)
+        self.storage.snapshot('file.snap')
+        self.snapshot.close()
+        self.assertEqual(self.snapshot.count(State), 1)
+        self.assertIs(states['State.' + self.state.id], state)
+        with self.assertRaises(KeyError):
+            states['State.' + self.other.id]
+
+    def test_index(self):
+        """ The key and reverse index tables are searched in the file """
+        snapshot = Snapshot('file.snap')
+        self.assertEqual(list(snapshot.keys('State')),
+                         sorted(['State.' + self.state.id,
+                                 'State.' + self.other.id]))
+        self.assertEqual(len(snapshot.keys('Review')), 0)
+        self.assertIsNone(snapshot.record('State', 'State.missing'))
+        self.assertIsNone(snapshot.record('State', 'State.'))
+        self.assertEqual(snapshot.refs('City', 'state_id', self.state.id),
+                         ['City.' + self.city.id])
+        self.assertEqual(snapshot.refs('City', 'state_id', 'missing'), [])
+        self.assertEqual(snapshot.refs('Place', 'amenity_ids', ['a1']), [])
+        self.assertEqual(snapshot.refs('City', 'name', 'Fremont'), [])
+        snapshot.close()
+        self.assertIsNone(snapshot.record('City', 'City.' + self.city.id))
@@ -0,0 +1,260 @@
+#!/usr/bin/python3
+""" Module for testing the SQLite storage engine"""
+import importlib
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from sqlalchemy import event, inspect
+from models.state import State
+from models.city import City
+from models.engine.sqlite_storage import SQLiteStorage
+
+
+@unittest.skipIf(os.getenv('HBNB_TYPE_STORAGE') != 'sqlite',
+                 "This test only work in SQLiteStorage")
+class test_sqlite_storage(unittest.TestCase):
+    """ Class to test the SQLite storage engine """
+
+    def setUp(self):
+        """ Open a storage on a new database file """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'hbnb.db')
+        self.storage = SQLiteStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close the storage and remove the database """
+        self.storage.close()
+        self.directory.cleanup()
+
+    def test_pragmas(self):
+        """ Connections use the write-ahead log """
+        engine = self.storage._DBStorage__engine
+        with engine.connect() as connection:
+            mode = connection.exec_driver_sql('PRAGMA journal_mode')
+            self.assertEqual(mode.scalar(), 'wal')
+            keys = connection.exec_driver_sql('PRAGMA foreign_keys')
+            self.assertEqual(keys.scalar(), 1)
+
+    def test_new_save(self):
+        """ Saved objects are found by all() """
+        state = State(name='California')
+        self.storage.new(state)
+        self.storage.save()
+        self.assertIn('State.' + state.id, self.storage.all(State))
+        self.assertIn('State.' + state.id, self.storage.all())
+
+    def test_delete(self):
+        """ Deleting a State deletes its cities """
+        state = State(name='California')
+        city = City(name='Fremont', state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        self.storage.delete(state)
+        self.storage.save()
+        self.assertEqual(self.storage.all(State), {})
+        self.assertEqual(self.storage.all(City), {})
+
+    def test_reload(self):
+        """ Objects persist in the database file """
+        state = State(name='California')
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        storage = SQLiteStorage(self.path)
+        storage.reload()
+        self.assertEqual(list(storage.all(State)), ['State.' + state.id])
+        storage.close()
+
+    def test_query(self):
+        """ query() is answered by the database """
+        states = [State(name=name) for name in ('Texas', 'Alaska', 'Ohio')]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        found = self.storage.query(State, order_by='name', limit=2)
+        self.assertEqual(list(found.values()), [states[1], states[2]])
+        found = self.storage.query('State', name__in=['Ohio', 'Utah'])
+        self.assertEqual(list(found), ['State.' + states[2].id])
+        found = self.storage.filter(State, [('name', 'gt', 'Ohio')])
+        self.assertEqual(list(found.values()), [states[0]])
+
+    def test_get_count(self):
+        """ get() finds one object by id and count() counts rows """
+        state = State(name='California')
+        self.storage.new(state)
+        self.storage.new(City(name='Fremont', state_id=state.id))
+        self.storage.save()
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertIs(self.storage.get('State', state.id), state)
+        self.assertIsNone(self.storage.get(State, 'missing'))
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count('BaseModel'), 0)
+
+    def test_page_iter(self):
+        """ page() and iter() walk a table in id order """
+        states = [State(name=str(i)) for i in range(5)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        states.sort(key=lambda state: state.id)
+        page = self.storage.page(State, states[1].id, 2)
+        self.assertEqual(list(page.values()), states[2:4])
+        self.assertEqual(list(self.storage.iter(State, batch_size=2)),
+                         states)
+        self.assertEqual(len(list(self.storage.iter())), 5)
+
+    def statements(self, storage=None):
+        """ Returns a list recording the SQL statements run from now """
+        statements = []
+        engine = (storage or self.storage)._DBStorage__engine
+
+        def record(conn, cursor, statement, parameters, context, many):
+            """ Records one statement """
+            statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', record)
+        self.addCleanup(event.remove, engine, 'before_cursor_execute',
+                        record)
+        return statements
+
+    def test_render_cities_by_states(self):
+        """ The cities by states page runs one query per table """
+        for i in range(3):
+            state = State(name='State {}'.format(i))
+            self.storage.new(state)
+            for j in range(2):
+                self.storage.new(City(name='City {}'.format(j),
+                                      state_id=state.id))
+        self.storage.save()
+        self.storage.close()
+        view = importlib.import_module('web_flask.8-cities_by_states')
+        statements = self.statements()
+        with patch.object(view, 'storage', self.storage):
+            page = view.app.test_client().get('/cities_by_states')
+        self.assertEqual(page.data.decode().count('City 1'), 3)
+        self.assertEqual(len(statements), 2)
+
+    def test_thread_sessions(self):
+        """ Each thread works in its own session and pool connection """
+        state = State(name='California')
+        self.storage.new(state)
+        self.storage.save()
+        registry = self.storage._DBStorage__session
+        sessions = []
+        found = []
+
+        def request():
+            """ Reads the state as a request would """
+            found.append(self.storage.get(State, state.id).name)
+            sessions.append(registry())
+            self.storage.close()
+        threads = [threading.Thread(target=request) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(found, ['California'] * 4)
+        self.assertEqual(len(set(map(id, sessions + [registry()]))), 5)
+        stats = self.storage.pool_stats()
+        self.assertGreaterEqual(stats['checkouts'], 5)
+        self.assertEqual(stats['timeouts'], 0)
+        self.assertEqual(stats['checked_out'], 0)
+
+    def test_bulk_insert_upsert(self):
+        """ Rows shaped like to_dict() are inserted, then updated """
+        state = State(name='California')
+        rows = [state.to_dict()] + [{'name': str(i)} for i in range(4)]
+        self.assertEqual(self.storage.bulk_insert(State, rows, 2), 5)
+        self.assertEqual(self.storage.count(State), 5)
+        self.assertEqual(self.storage.get(State, state.id).name,
+                         'California')
+        rows = [dict(state.to_dict(), name='Nevada'), {'name': 'Utah'}]
+        self.assertEqual(self.storage.bulk_upsert('State', rows), 2)
+        self.assertEqual(self.storage.count(State), 6)
+        self.assertEqual(self.storage.get(State, state.id).name, 'Nevada')
+
+    def test_all_parallel(self):
+        """ all() reading the tables in threads finds the same objects """
+        state = State(name='California')
+        self.storage.new(state)
+        self.storage.new(City(name='Fremont', state_id=state.id))
+        self.storage.save()
+        expected = sorted(self.storage.all())
+        self.storage.close()
+        self.storage.workers = 3
+        objects = self.storage.all()
+        self.assertEqual(sorted(objects), expected)
+        state = objects['State.' + state.id]
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertEqual([city.name for city in state.cities], ['Fremont'])
+
+    def test_all_parallel_pending(self):
+        """ all() with threads finds the objects not yet committed """
+        state = State(name='California')
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.workers = 3
+        added = State(name='Nevada')
+        self.storage.new(added)
+        self.storage.delete(state)
+        objects = self.storage.all()
+        self.assertIn('State.' + added.id, objects)
+        self.assertNotIn('State.' + state.id, objects)
+
+    def test_migrations(self):
+        """ An existing database gets the lookup indexes on reload """
+        engine = self.storage._DBStorage__engine
+        with engine.begin() as connection:
+            connection.exec_driver_sql('DROP INDEX ix_states_name')
+            connection.exec_driver_sql('DELETE FROM schema_migrations')
+            connection.exec_driver_sql('DELETE FROM schema_version')
+        self.storage.reload()
+        indexes = inspect(engine).get_indexes('states')
+        self.assertEqual([index['column_names'] for index in indexes],
+                         [['name']])
+        with engine.connect() as connection:
+            versions = connection.exec_driver_sql(
+                'SELECT version FROM schema_migrations').scalars().all()
+        self.assertEqual(versions, [1])
+
+    def test_reload_current(self):
+        """ reload() of a current schema runs a single query """
+        statements = self.statements()
+        self.storage.reload()
+        self.assertEqual(len(statements), 1)
+        storage = SQLiteStorage(self.path, reload=False)
+        statements = self.statements(storage)
+        self.assertEqual(storage.count(State), 0)
+        self.assertEqual(len(statements), 1)
+        storage.close()
+
+    def test_events(self):
+        """ Committed changes are published, rolled back ones are not """
+        events = []
+        subscriber = self.storage.events.subscribe(events.append)
+        try:
+            state = State(name='California')
+            self.storage.new(state)
+            self.storage.save()
+            state.name = 'Nevada'
+            self.storage.save()
+            with self.assertRaises(RuntimeError):
+                with self.storage.batch():
+                    self.storage.new(State(name='Utah'))
+                    self.storage.save()
+                    raise RuntimeError()
+            self.storage.delete(state)
+            self.storage.save()
+        finally:
+            self.storage.events.unsubscribe(subscriber)
+        self.assertEqual([(event.kind, event.cls, event.id)
+                          for event in events],
+                         [('created', 'State', state.id),
+                          ('updated', 'State', state.id),
+                          ('deleted', 'State', state.id)])
+        self.assertIn('name', events[0].fields)
+        self.assertEqual(events[1].fields, {'name'})
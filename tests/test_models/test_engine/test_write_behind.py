@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+""" Module for testing the write-behind mode of FileStorage"""
+import json
+import os
+import time
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.state import State
+
+
+class test_write_behind(unittest.TestCase):
+    """ Class to test the deferred saves of FileStorage """
+
+    def setUp(self):
+        """ Set up a write-behind storage with an empty __objects """
+        FileStorage._FileStorage__objects.clear()
+        environ = {'HBNB_FILE_WRITE': 'behind',
+                   'HBNB_FLUSH_INTERVAL': '0.2',
+                   'HBNB_FLUSH_MAX_CHANGES': '5'}
+        with patch.dict(os.environ, environ):
+            self.storage = FileStorage()
+
+    def tearDown(self):
+        """ Stop the flusher and remove the storage file """
+        self.storage._FileStorage__behind.close()
+        FileStorage._FileStorage__objects.clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def read(self):
+        """ Returns the keys saved in file.json """
+        with open('file.json', 'r') as f:
+            return sorted(json.load(f))
+
+    def test_flush(self):
+        """ save() returns before writing, flush() writes """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.assertFalse(os.path.exists('file.json'))
+        self.storage.flush()
+        self.assertEqual(self.read(), ['BaseModel.' + new.id])
+
+    def test_flusher(self):
+        """ The flusher writes the coalesced saves after the interval """
+        new = BaseModel()
+        self.storage.new(new)
+        for i in range(3):
+            new.name = str(i)
+            self.storage.save()
+        self.assertFalse(os.path.exists('file.json'))
+        deadline = time.monotonic() + 5
+        while not self.storage.write_behind_stats()['flushes'] and \
+                time.monotonic() < deadline:
+            time.sleep(0.05)
+        with open('file.json', 'r') as f:
+            self.assertEqual(json.load(f)['BaseModel.' + new.id]['name'],
+                             '2')
+        stats = self.storage.write_behind_stats()
+        self.assertEqual(stats['deferred'], 3)
+        self.assertEqual(stats['flushes'], 1)
+
+    def test_max_changes(self):
+        """ A save with max_changes pending writes at once """
+        objects = [BaseModel() for i in range(5)]
+        for obj in objects[:4]:
+            self.storage.new(obj)
+        self.storage.save()
+        self.assertFalse(os.path.exists('file.json'))
+        self.storage.new(objects[4])
+        self.storage.save()
+        self.assertEqual(len(self.read()), 5)
+        self.assertEqual(self.storage.write_behind_stats()['forced'], 1)
+
+    def test_reload(self):
+        """ reload() writes the deferred changes before reading """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        new.name = 'kept'
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(BaseModel, new.id).name, 'kept')
+        self.assertEqual(self.read(), ['BaseModel.' + new.id])
+
+    def test_flusher_batch(self):
+        """ The flusher leaves out the changes of an open batch """
+        self.storage.new(State(name='saved'))
+        self.storage.save()
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                self.storage.new(State(name='in-batch'))
+                self.storage.save()
+                time.sleep(0.5)
+                raise RuntimeError()
+        with open('file.json', 'r') as f:
+            text = f.read()
+        self.assertIn('saved', text)
+        self.assertNotIn('in-batch', text)
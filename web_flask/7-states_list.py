@@ -12,7 +12,7 @@ app = Flask(__name__)
 @app.route('/states_list', strict_slashes=False)
 def states_list():
     """Displaying the states in alphabetical order in an HTML page"""
-    states = sorted(list(storage.all("State").values()), key=lambda x: x.name)
+    states = storage.query("State", order_by='name').values()
     return render_template('7-states_list.html', states=states)
 
 
@@ -12,7 +12,7 @@ app = Flask(__name__)
 @app.route('/cities_by_states', strict_slashes=False)
 def cities_by_states():
     """Displaying the states in alphabetical order in an HTML page"""
-    states = storage.all("State").values()
+    states = storage.all("State", load=['cities']).values()
     return render_template('8-cities_by_states.html', states=states)
 
 
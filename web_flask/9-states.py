@@ -13,9 +13,12 @@ app = Flask(__name__)
 @app.route('/states/<state_id>', strict_slashes=False)
 def states(state_id=None):
     """Displaying the states in alphabetical order in an HTML page"""
-    states = storage.all("State")
-    if state_id is not None:
+    if state_id is None:
+        states = storage.query("State", order_by='name')
+    else:
+        state = storage.get("State", state_id)
         state_id = 'State.' + state_id
+        states = {} if state is None else {state_id: state}
     return render_template('9-states.html', states=states, state_id=state_id)
 
 